@@ -0,0 +1,116 @@
+import hashlib
+import os
+import shutil
+import sys
+from collections import defaultdict
+
+# ioctl request number for FICLONE on Linux
+FICLONE = 0x40049409
+
+
+def file_digest(file_path, throttle=None, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            if throttle:
+                throttle.bandwidth.consume(len(chunk))
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reflink_file(existing_file, dest_file, source_file=None):
+    """
+    Create dest_file as a copy-on-write clone of existing_file (Linux btrfs/XFS only).
+
+    Metadata is copied from source_file, the file dest_file replicates,
+    so the clone keeps its own modified time.
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError("Reflinks are not supported on this platform")
+    import fcntl
+
+    with open(existing_file, 'rb') as src, open(dest_file, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(dest_file)
+            raise
+    shutil.copystat(source_file or existing_file, dest_file)
+
+
+def remove_existing(dest_file):
+    # Replace rather than overwrite, so a file hardlinked by an earlier run does not write through to its siblings
+    if os.path.lexists(dest_file):
+        os.remove(dest_file)
+
+
+def link_file(existing_file, dest_file, link_mode='auto', source_file=None):
+    """
+    Point dest_file at the content of existing_file without copying it.
+
+    A reflink gets its own metadata from source_file. A hardlink shares the
+    inode, and with it the modified time, of existing_file.
+
+    Args:
+        existing_file (str): Already replicated file with the same content.
+        dest_file (str): Path to create.
+        link_mode (str): 'reflink', 'hardlink' or 'auto' (reflink, then hardlink).
+        source_file (str): The source file dest_file replicates.
+
+    Returns:
+        bool: True if a link was created, False if the filesystem allows neither
+    """
+    remove_existing(dest_file)
+
+    if link_mode in ('auto', 'reflink'):
+        try:
+            reflink_file(existing_file, dest_file, source_file)
+            return True
+        except OSError:
+            pass
+    if link_mode in ('auto', 'hardlink'):
+        try:
+            os.link(existing_file, dest_file)
+            return True
+        except (OSError, AttributeError):
+            pass
+    return False
+
+
+class ContentIndex:
+    """
+    Remembers replicated files so later identical files can be linked.
+
+    Files are grouped by size first and only hashed once another file of
+    the same size shows up, so files with a unique size are never read.
+    """
+
+    def __init__(self, throttle=None):
+        self.throttle = throttle
+        self._by_size = defaultdict(list)
+
+    def find(self, source_file, size):
+        """
+        Returns:
+            tuple: (destination of an identical earlier file or None, digest of source_file or None)
+        """
+        entries = self._by_size.get(size)
+        if not entries:
+            return None, None
+        digest = file_digest(source_file, self.throttle)
+        for entry in entries:
+            if entry[2] is None:
+                try:
+                    entry[2] = file_digest(entry[0], self.throttle)
+                except OSError:
+                    continue
+            if entry[2] == digest:
+                return entry[1], digest
+        return None, digest
+
+    def add(self, source_file, dest_file, size, digest=None):
+        self._by_size[size].append([source_file, dest_file, digest])
@@ -1,6 +1,11 @@
 import os
 from collections import defaultdict
+from itertools import chain, repeat
 from pathlib import Path
+import numpy as np
+import pandas as pd
+
+DUPLICATE_COLUMNS = ['Duplicate_Group', 'File_Number', 'Total_in_Group', 'Type', 'Name', 'Path', 'Extension', 'Size_Bytes', 'Hash']
 
 
 def get_file_name(file_path):
@@ -35,35 +40,103 @@ def find_duplicates(file_list):
     return duplicates
 
 
+def build_duplicate_frame(files, keys):
+    """
+    Number duplicate groups and their members without per-row Python loops.
+
+    Args:
+        files (pd.DataFrame): One row per file with Type, Name, Path, Extension and Size columns
+        keys (array-like): Duplicate key of each row (the lowercase file name)
+
+    Returns:
+        pd.DataFrame: Rows of groups with more than one file, grouped in order of first appearance
+    """
+    codes, _ = pd.factorize(np.asarray(keys, dtype=object))
+    counts = np.bincount(codes) if len(codes) else np.array([], dtype=np.int64)
+    in_group = counts[codes] > 1 if len(codes) else np.array([], dtype=bool)
+
+    files = files.loc[in_group]
+    keys = np.asarray(keys, dtype=object)[in_group]
+    codes, _ = pd.factorize(keys)
+    counts = np.bincount(codes) if len(codes) else np.array([], dtype=np.int64)
+
+    # Stable sort keeps the original order of files within each group
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    group_starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if len(counts) else counts
+
+    def column(name, default):
+        if name in files.columns:
+            return files[name].to_numpy()[order]
+        return np.full(len(order), default, dtype=object)
+
+    return pd.DataFrame({
+        'Duplicate_Group': codes + 1,
+        'File_Number': np.arange(len(codes)) - group_starts[codes] + 1,
+        'Total_in_Group': counts[codes],
+        'Type': column('Type', 'File'),
+        'Name': column('Name', None),
+        'Path': column('Path', None),
+        'Extension': column('Extension', None),
+        'Size_Bytes': column('Size', None),
+        'Hash': keys[order],  # This is actually the filename for duplicate detection
+    }, columns=DUPLICATE_COLUMNS)
+
+
+def find_duplicate_frame(data):
+    """
+    Vectorized duplicate detection on scan results, reusing the sizes the scan already collected.
+
+    Args:
+        data (list or pd.DataFrame): Output of collect_folders_and_files()
+
+    Returns:
+        pd.DataFrame: Same columns as format_duplicate_results()
+    """
+    frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    if frame.empty or 'Type' not in frame.columns:
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+    files = frame[frame['Type'] == 'File']
+    keys = files['Name'].str.lower()
+    return build_duplicate_frame(files, keys)
+
+
 def format_duplicate_results(duplicates):
     """
     Format duplicate detection results for Excel export.
-    
+
+    The groups from find_duplicates() are already contiguous, so numbering
+    is done with NumPy and each field is gathered into one column array
+    instead of one dict per row.
+
     Args:
         duplicates (dict): Dictionary from find_duplicates()
-        
+
     Returns:
-        list: List of dictionaries formatted for Excel export
+        pd.DataFrame: One row per duplicate file with the DUPLICATE_COLUMNS columns
     """
-    results = []
-    group_id = 1
-    
-    for filename, files in duplicates.items():
-        for i, file_info in enumerate(files):
-            results.append({
-                'Duplicate_Group': group_id,
-                'File_Number': i + 1,
-                'Total_in_Group': len(files),
-                'Type': file_info.get('Type', 'File'),
-                'Name': file_info.get('Name'),
-                'Path': file_info.get('Path'),
-                'Extension': file_info.get('Extension'),
-                'Size_Bytes': file_info.get('Size'),
-                'Hash': filename  # This is actually the filename for duplicate detection
-            })
-        group_id += 1
-    
-    return results
+    sizes = np.fromiter(map(len, duplicates.values()), dtype=np.int64, count=len(duplicates))
+    totals = np.repeat(sizes, sizes)
+    group_starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    rows = list(chain.from_iterable(duplicates.values()))
+
+    def column(values):
+        array = np.empty(len(rows), dtype=object)
+        array[:] = values
+        return array
+
+    return pd.DataFrame({
+        'Duplicate_Group': np.repeat(np.arange(1, len(sizes) + 1), sizes),
+        'File_Number': np.arange(len(rows)) - group_starts + 1,
+        'Total_in_Group': totals,
+        'Type': column([row.get('Type', 'File') for row in rows]),
+        'Name': column([row.get('Name') for row in rows]),
+        'Path': column([row.get('Path') for row in rows]),
+        'Extension': column([row.get('Extension') for row in rows]),
+        'Size_Bytes': column([row.get('Size') for row in rows]),
+        # This is actually the filename for duplicate detection
+        'Hash': column(list(chain.from_iterable(repeat(filename, len(files)) for filename, files in duplicates.items()))),
+    }, columns=DUPLICATE_COLUMNS)
 
 
 def get_duplicate_statistics(duplicates):
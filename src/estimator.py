@@ -0,0 +1,293 @@
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from src.scanner import collect_folder_rows
+from src.throttle import stat_file
+from src.traversal import normalize_excluded_folders
+
+# Standard errors of the probe mean on either side of an estimate. The probe estimates are
+# heavy-tailed on skewed trees, so the range is a rough indication, not a confidence interval
+BOUND_ERRORS = 2.0
+# Per-folder quantities: subfolder rows, file rows, bytes, seconds
+FOLDERS, FILES, BYTES, SECONDS = range(4)
+# Files kept for estimate_copy_seconds()
+MAX_SAMPLE_FILES = 100
+
+
+def _mean_and_variance(values):
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    return mean, sum((v - mean) ** 2 for v in values) / (n - 1)
+
+
+def _target_key(entry, throttle):
+    try:
+        st = stat_file(entry.path, throttle)
+        return st.st_dev, st.st_ino
+    except OSError:
+        return None
+
+
+def _on_other_device(path, root_dev, throttle):
+    try:
+        return stat_file(path, throttle).st_dev != root_dev
+    except OSError:
+        return True
+
+
+def _sample_folder(folder, include_files, extensions, excluded_folders, follow_symlinks, visited, max_stats, throttle,
+                   rng, root_dev=None, journaled=False):
+    """
+    List one folder and time the scanner's own row building on it.
+
+    Returns:
+        tuple: (subfolder paths, None for those listed but not descended,
+            [subfolders, files, bytes, seconds], [(path, size) of the stat'ed files])
+    """
+    if follow_symlinks:
+        # Every ancestor of a candidate was sampled, so this is enough to stop symlink loops
+        try:
+            st = stat_file(folder, throttle)
+            visited.add((st.st_dev, st.st_ino))
+        except OSError:
+            pass
+    if throttle:
+        throttle.listing()
+    started = time.perf_counter()
+    try:
+        with os.scandir(folder) as it:
+            # Sorted so a seed gives the same samples on every filesystem
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        entries = []
+
+    dirnames = []
+    subfolders = []
+    files = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if entry.name.lower() in excluded_folders:
+                continue
+            dirnames.append(entry.name)
+            if entry.is_symlink() and not (follow_symlinks and _target_key(entry, throttle) not in visited):
+                # Listed but not descended, like the real walk
+                subfolders.append(None)
+            elif root_dev is not None and _on_other_device(entry.path, root_dev, throttle):
+                subfolders.append(None)
+            else:
+                subfolders.append(entry.path)
+        elif include_files:
+            if extensions and not any(entry.name.lower().endswith(ext.lower()) for ext in extensions):
+                continue
+            files.append(entry.name)
+    list_seconds = time.perf_counter() - started
+
+    # Folder rows are built in full, file rows for a bounded sample that is scaled up to the folder's file count
+    started = time.perf_counter()
+    folder_rows = collect_folder_rows(folder, dirnames, [], throttle=throttle)
+    if journaled:
+        json.dumps(folder_rows)
+    folder_seconds = time.perf_counter() - started
+
+    stat_sample = rng.sample(files, min(len(files), max_stats))
+    started = time.perf_counter()
+    file_rows = collect_folder_rows(folder, [], stat_sample, True, extensions, throttle)
+    if journaled:
+        json.dumps(file_rows)
+    file_seconds = time.perf_counter() - started
+
+    scale = len(files) / len(stat_sample) if stat_sample else 0
+    values = [
+        len(dirnames),
+        len(files),
+        sum(row['Size'] for row in file_rows) * scale,
+        list_seconds + folder_seconds + file_seconds * scale,
+    ]
+    return subfolders, values, [(row['Path'], row['Size']) for row in file_rows]
+
+
+def estimate_tree(root_folder, include_files=False, extensions=None, excluded_folders=None, follow_symlinks=False,
+                  one_filesystem=False, max_listings=1000, min_probes=30, max_stats_per_folder=20, max_depth=256,
+                  throttle=None, seed=None, journaled=False):
+    """
+    Estimate the size of a tree and the time to scan it from a bounded number of folder listings.
+
+    The top levels are listed in full while they fit in half of max_listings,
+    so small trees are counted exactly. Below that, independent random-path
+    probes (Knuth's estimator) each descend from a random folder of the
+    first unlisted level to a leaf, picking subfolders in proportion to
+    their own entry count and weighting each folder by the inverse of the
+    probability of reaching it, so every probe is an unbiased estimate of
+    the unlisted part. The Low/High bounds are the mean of the probes plus
+    or minus two standard errors. Their coverage is not guaranteed: on
+    skewed trees most probes miss the few large branches, so a single
+    estimate is more often low than high.
+
+    Seconds are the time of the scanner's own per-folder code (listing, stat
+    and row building) on the sampled folders, plus the journal serialization
+    when journaled. Copy time is not included, see estimate_copy_seconds().
+
+    Args:
+        root_folder (str): Folder to estimate.
+        include_files (bool): Count files and bytes as well as folders.
+        extensions (list): Only count files with these extensions.
+        excluded_folders (list): Folder names to skip (case-insensitive).
+        follow_symlinks (bool): Descend into symlinked folders.
+        one_filesystem (bool): Do not descend into folders on other devices (mount points).
+        max_listings (int): Folders listed before probing stops (once min_probes are done).
+        min_probes (int): Minimum number of random-path probes.
+        max_stats_per_folder (int): Maximum files stat'ed per sampled folder.
+        throttle (IOThrottle): Optional rate limits for the sampling itself.
+        seed (int): Seed for reproducible samples.
+        journaled (bool): The scan records a journal, include its cost in the seconds.
+
+    Returns:
+        dict: 'Entries', 'Bytes' and 'Seconds' with 'Low'/'High' bounds,
+            'Folders', 'Files', 'Sampled Folders', 'Probes', 'Sample Files' and
+            'Exact' (True when every folder was listed, so the counts are not estimates)
+    """
+    rng = random.Random(seed)
+    excluded_folders = normalize_excluded_folders(excluded_folders)
+    root_dev = None
+    if one_filesystem:
+        try:
+            root_dev = stat_file(root_folder, throttle).st_dev
+        except OSError:
+            pass
+
+    listings = {}
+    visited = {None}
+
+    def sample(folder):
+        if folder not in listings:
+            listings[folder] = _sample_folder(folder, include_files, extensions, excluded_folders, follow_symlinks,
+                                              visited, max_stats_per_folder, throttle, rng, root_dev, journaled)
+        return listings[folder]
+
+    # Exact part: whole levels while they fit in half of the listing budget
+    totals = [0.0] * 4
+    level = [root_folder]
+    depth = 0
+    while level and depth < max_depth and (depth == 0 or len(listings) + len(level) <= max_listings // 2):
+        for folder in level:
+            for quantity, value in enumerate(sample(folder)[1]):
+                totals[quantity] += value
+        level = [path for folder in level for path in sample(folder)[0] if path is not None]
+        depth += 1
+    exact = not level or depth >= max_depth
+
+    # Estimated part: random paths below the first level that was not listed
+    probes = []
+    if not exact:
+        max_probes = max(min_probes, 10 * max_listings)
+        while len(probes) < min_probes or (len(listings) < max_listings and len(probes) < max_probes):
+            values = [0.0] * 4
+            weight = len(level)
+            folder = rng.choice(level)
+            probe_depth = depth
+            while probe_depth < max_depth:
+                subfolders, folder_values, _ = sample(folder)
+                for quantity, value in enumerate(folder_values):
+                    values[quantity] += weight * value
+                children = [path for path in subfolders if path is not None]
+                if not children:
+                    break
+                # Prefer subfolders with more entries, at the cost of listing them all
+                sizes = [1 + sample(child)[1][FOLDERS] + sample(child)[1][FILES] for child in children]
+                total = sum(sizes)
+                index = rng.choices(range(len(children)), weights=sizes)[0]
+                weight *= total / sizes[index]
+                folder = children[index]
+                probe_depth += 1
+            probes.append(values)
+
+    def bounded(*quantities):
+        exact_total = sum(totals[q] for q in quantities)
+        if not probes:
+            return exact_total, 0.0
+        mean, variance = _mean_and_variance([sum(probe[q] for q in quantities) for probe in probes])
+        return exact_total + mean, BOUND_ERRORS * math.sqrt(variance / len(probes))
+
+    folders, _ = bounded(FOLDERS)
+    files, _ = bounded(FILES)
+    entries, entries_margin = bounded(FOLDERS, FILES)
+    total_bytes, bytes_margin = bounded(BYTES)
+    seconds, seconds_margin = bounded(SECONDS)
+
+    sample_files = [item for _, _, folder_files in listings.values() for item in folder_files]
+    if len(sample_files) > MAX_SAMPLE_FILES:
+        sample_files = rng.sample(sample_files, MAX_SAMPLE_FILES)
+
+    return {
+        'Folders': round(folders),
+        'Files': round(files),
+        'Entries': round(entries),
+        'Entries Low': max(0, round(entries - entries_margin)),
+        'Entries High': round(entries + entries_margin),
+        'Bytes': round(total_bytes),
+        'Bytes Low': max(0, round(total_bytes - bytes_margin)),
+        'Bytes High': round(total_bytes + bytes_margin),
+        'Seconds': seconds,
+        'Seconds Low': max(0.0, seconds - seconds_margin),
+        'Seconds High': seconds + seconds_margin,
+        'Sampled Folders': len(listings),
+        'Probes': len(probes),
+        'Sample Files': sample_files,
+        'Exact': exact,
+    }
+
+
+def estimate_copy_seconds(estimate, destination, throttle=None, max_bytes=64 * 1024 * 1024):
+    """
+    Estimate the time to copy estimate['Bytes'] into destination.
+
+    With a bandwidth limit the limit is the rate. Otherwise the files stat'ed
+    while estimating are copied into a temporary folder on the destination,
+    up to max_bytes, and the measured seconds per byte are scaled up.
+
+    Returns:
+        float: Seconds, 0.0 when nothing could be measured
+    """
+    if not estimate['Bytes']:
+        return 0.0
+    if throttle and throttle.bandwidth.rate:
+        return estimate['Bytes'] / throttle.bandwidth.rate
+
+    copied = 0
+    seconds = 0.0
+    temp_dir = tempfile.mkdtemp(prefix='.folderscanner-', dir=destination)
+    try:
+        for number, (file_path, size) in enumerate(estimate.get('Sample Files', [])):
+            if copied >= max_bytes:
+                break
+            started = time.perf_counter()
+            try:
+                shutil.copy2(file_path, os.path.join(temp_dir, str(number)))
+            except OSError:
+                continue
+            seconds += time.perf_counter() - started
+            copied += size
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    if not copied:
+        return 0.0
+    return estimate['Bytes'] * seconds / copied
+
+
+def check_free_space(destination, required_bytes):
+    """
+    Returns:
+        tuple: (True if destination has at least required_bytes free, free bytes)
+    """
+    free = shutil.disk_usage(destination).free
+    return free >= required_bytes, free
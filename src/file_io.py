@@ -2,11 +2,19 @@ import pandas as pd
 from tkinter import filedialog
 from datetime import datetime
 from pathlib import Path
+import hashlib
+import json
 import os
 
-def save_to_excel(data, file_path):
+def save_to_excel(data, file_path, extra_sheets=None):
     df = pd.DataFrame(data)
-    df.to_excel(file_path, index=False)
+    if not extra_sheets:
+        df.to_excel(file_path, index=False)
+        return
+    with pd.ExcelWriter(file_path) as writer:
+        df.to_excel(writer, index=False)
+        for sheet_name, sheet_data in extra_sheets.items():
+            pd.DataFrame(sheet_data).to_excel(writer, sheet_name=sheet_name, index=False)
 
 def select_folder(title):
     folder_selected = filedialog.askdirectory(title=title)
@@ -14,8 +22,7 @@ def select_folder(title):
         raise FileNotFoundError("No folder selected.")
     return folder_selected
 
-def select_save_location(report_type):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def get_reports_folder():
     try:
         desktop = str(Path.home() / "Documents")
         if not os.path.exists(desktop):
@@ -24,16 +31,24 @@ def select_save_location(report_type):
             desktop = str(Path.home())
     except:
         desktop = os.getcwd()
+    return desktop
+
+def select_save_location(report_type):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    desktop = get_reports_folder()
     
     if report_type == "duplicates":
         filename = f"Duplicate_Files_Report_{timestamp}.xlsx"
+    elif report_type == "verification":
+        filename = f"Verification_Report_{timestamp}.xlsx"
     else:
         filename = f"Folder_Structure_{timestamp}.xlsx"
         
     file_path = os.path.join(desktop, filename)
     return file_path
 
-    
-
-
-
+def get_journal_path(operation, params):
+    # Same operation with the same parameters always maps to the same journal,
+    # so an interrupted run can find its checkpoint again
+    key = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(get_reports_folder(), ".folderscanner", f"{operation}_{key}.journal")
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+
+
+class Journal:
+    """
+    Append-only checkpoint log for long scans and replications.
+
+    Each line is a JSON record: a header describing the run, completed
+    files (``file``) and completed directories (``dir``) together with the
+    report rows they produced. Writes are flushed immediately and fsynced
+    in batches, so a crash loses at most the last unsynced batch.
+
+    Args:
+        path (str): Journal file location.
+        header (dict): Run parameters. A resumed journal is only reused
+            when its header matches.
+        resume (bool): Load completed work from an existing journal.
+        fsync_every (int): Records written between fsyncs.
+        fsync_interval (float): Maximum seconds between fsyncs.
+    """
+
+    def __init__(self, path, header=None, resume=False, fsync_every=100, fsync_interval=2.0):
+        self.path = path
+        self.header = header or {}
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.completed_dirs = {}
+        self.completed_files = {}
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume and os.path.exists(path) and self._load():
+            self._file = open(path, 'a', encoding='utf-8')
+        else:
+            self.completed_dirs.clear()
+            self.completed_files.clear()
+            self._file = open(path, 'w', encoding='utf-8')
+            self._write({'header': self.header})
+            self.sync()
+
+    def _load(self):
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            first = True
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from an interrupted run; drop it and everything after
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                if first:
+                    if record.get('header') != self.header:
+                        return False
+                    first = False
+                elif 'dir' in record:
+                    self.completed_dirs[record['dir']] = record['rows']
+                elif 'file' in record:
+                    self.completed_files[record['file']] = record['row']
+                good_offset += len(line)
+        if first:
+            return False
+        with open(self.path, 'r+b') as f:
+            f.truncate(good_offset)
+        return True
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def record_file(self, path, row):
+        self.completed_files[path] = row
+        self._write({'file': path, 'row': row})
+
+    def record_dir(self, path, rows):
+        self.completed_dirs[path] = rows
+        self._write({'dir': path, 'rows': rows})
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def discard(self):
+        """Close and delete the journal once the run has completed."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,414 @@
+"""
+Sharded scan manifests.
+
+A manifest is a gzip stream holding the output of collect_folders_and_files
+sorted by path:
+
+    b'FSMANIF1'
+    u32 header length, JSON header ({"version", "root", "options"})
+    u32 record length, record      (repeated until end of stream)
+
+Each record is a flags byte (bit 0: file, bit 1: counted in unique size),
+a u64 size, a u32 link count, u64 st_dev and st_ino (only set for files
+with several links, 0 otherwise) and the UTF-8 posix path. Name and
+extension are derived from the path. All integers are big-endian.
+
+Hardlinks are de-counted again during the merge using st_dev/st_ino, so a
+link pair split across shards adds its size once. Device numbers are only
+comparable between shards scanned on the same machine; for shards from
+different machines the unique size is exact only within each shard.
+
+A shard also holds a Folder record for its own root, so merged shards list
+the same folders as one scan of their common root.
+
+Shards of one tree can be scanned independently (by different processes or
+machines) and merged with a streaming k-way merge:
+
+    python -m src.manifest scan /data/a a.fsm --include-files
+    python -m src.manifest scan /data/b b.fsm --include-files
+    python -m src.manifest merge report.xlsx a.fsm b.fsm
+"""
+import argparse
+import gzip
+import heapq
+import json
+import os
+import struct
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+import pandas as pd
+from openpyxl import Workbook
+from src.scanner import collect_folders_and_files
+from src.duplicate_detector import build_duplicate_frame, DUPLICATE_COLUMNS
+from src.reports import summarize_by_extension, summarize_by_depth, largest_files
+
+MAGIC = b'FSMANIF1'
+VERSION = 1
+LENGTH = struct.Struct('>I')
+RECORD = struct.Struct('>BQIQQ')
+FLAG_FILE = 1
+FLAG_UNIQUE = 2
+# Excel sheets hold 1,048,576 rows including the header
+MAX_SHEET_ROWS = 1048575
+
+
+def _sort_key(row):
+    return row['Path']
+
+
+def _encode(row):
+    is_file = row.get('Type') == 'File'
+    size = int(row.get('Size') or 0) if is_file else 0
+    flags = FLAG_FILE if is_file else 0
+    if is_file and row.get('Unique Size', size) == size and size:
+        flags |= FLAG_UNIQUE
+    links = int(row.get('Links') or 1)
+    dev = ino = 0
+    if is_file and links > 1:
+        # Only multiply-linked files need their inode for de-counting across shards
+        try:
+            st = os.stat(row['Path'])
+            dev, ino = st.st_dev, st.st_ino
+        except OSError:
+            pass
+    path = row['Path'].encode('utf-8')
+    return RECORD.pack(flags, size, links, dev, ino) + path
+
+
+def _decode(payload):
+    """
+    Returns:
+        tuple: (row, (st_dev, st_ino) of a multiply-linked file or None)
+    """
+    flags, size, links, dev, ino = RECORD.unpack_from(payload)
+    path = payload[RECORD.size:].decode('utf-8')
+    name = path.rsplit('/', 1)[-1]
+    if not flags & FLAG_FILE:
+        return {'Type': 'Folder', 'Name': name, 'Path': path, 'Extension': ''}, None
+    return {
+        'Type': 'File',
+        'Name': name,
+        'Path': path,
+        'Extension': os.path.splitext(name)[1],
+        'Size': size,
+        'Links': links,
+        'Unique Size': size if flags & FLAG_UNIQUE else 0,
+    }, (dev, ino) if ino else None
+
+
+def _write_stream(rows, manifest_path, header):
+    count = 0
+    header_bytes = json.dumps(dict(header, version=VERSION), default=str).encode('utf-8')
+    with gzip.open(manifest_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for row in rows:
+            payload = _encode(row)
+            f.write(LENGTH.pack(len(payload)))
+            f.write(payload)
+            count += 1
+    return count
+
+
+def write_manifest(data, manifest_path, root_folder, options=None):
+    """
+    Write scan results as a sorted manifest.
+
+    Returns:
+        int: Number of records written
+    """
+    header = {'root': Path(root_folder).as_posix(), 'options': options or {}}
+    return _write_stream(sorted(data, key=_sort_key), manifest_path, header)
+
+
+def scan_to_manifest(root_folder, manifest_path, include_files=False, extensions=None, excluded_folders=None, **scan_options):
+    data = collect_folders_and_files(root_folder, include_files, extensions, excluded_folders, **scan_options)
+    if os.path.isdir(root_folder):
+        root_path = Path(root_folder).as_posix()
+        data.append({'Type': 'Folder', 'Name': root_path.rsplit('/', 1)[-1], 'Path': root_path, 'Extension': ''})
+    options = {
+        'include_files': include_files,
+        'extensions': extensions,
+        'excluded_folders': excluded_folders,
+        'follow_symlinks': scan_options.get('follow_symlinks', False),
+        'one_filesystem': scan_options.get('one_filesystem', False),
+    }
+    return write_manifest(data, manifest_path, root_folder, options)
+
+
+def _read_exact(f, size, manifest_path):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"Truncated manifest: {manifest_path}")
+    return data
+
+
+def read_manifest_header(manifest_path):
+    with gzip.open(manifest_path, 'rb') as f:
+        return _read_header(f, manifest_path)
+
+
+def _read_header(f, manifest_path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"Not a FolderScanner manifest: {manifest_path}")
+    (length,) = LENGTH.unpack(_read_exact(f, LENGTH.size, manifest_path))
+    header = json.loads(_read_exact(f, length, manifest_path))
+    if header.get('version') != VERSION:
+        raise ValueError(f"Unsupported manifest version {header.get('version')}: {manifest_path}")
+    return header
+
+
+def iter_manifest(manifest_path):
+    """Yield the rows of a manifest one at a time, in path order."""
+    for row, _ in _iter_records(manifest_path):
+        yield row
+
+
+def _iter_records(manifest_path):
+    with gzip.open(manifest_path, 'rb') as f:
+        _read_header(f, manifest_path)
+        while True:
+            prefix = f.read(LENGTH.size)
+            if not prefix:
+                return
+            if len(prefix) != LENGTH.size:
+                raise ValueError(f"Truncated manifest: {manifest_path}")
+            (length,) = LENGTH.unpack(prefix)
+            yield _decode(_read_exact(f, length, manifest_path))
+
+
+def read_shard_headers(manifest_paths):
+    """
+    Read the headers of shards that are merged together.
+
+    Raises:
+        ValueError: If the shards were scanned with different options
+    """
+    headers = [read_manifest_header(p) for p in manifest_paths]
+    for manifest_path, header in zip(manifest_paths[1:], headers[1:]):
+        if header.get('options', {}) != headers[0].get('options', {}):
+            raise ValueError(f"Shard {manifest_path} was scanned with different options than {manifest_paths[0]}")
+    return headers
+
+
+def merge_manifests(manifest_paths):
+    """
+    k-way merge of sorted manifests, holding one record per shard in memory.
+
+    Entries present in several (overlapping) shards are yielded once, and the
+    common root of the shards is left out like in a single scan. The unique
+    size of multiply-linked files is re-counted over all shards, so only the
+    first link in path order keeps it.
+    """
+    previous_path = _common_root(read_shard_headers(manifest_paths))
+    seen_inodes = set()
+    records = heapq.merge(*(_iter_records(p) for p in manifest_paths), key=lambda record: record[0]['Path'])
+    for row, inode in records:
+        if row['Path'] == previous_path:
+            continue
+        previous_path = row['Path']
+        if inode:
+            row['Unique Size'] = 0 if inode in seen_inodes else row['Size']
+            seen_inodes.add(inode)
+        yield row
+
+
+def merge_to_manifest(manifest_paths, output_path):
+    headers = read_shard_headers(manifest_paths)
+    header = {'root': _common_root(headers), 'options': headers[0].get('options', {}) if headers else {},
+              'shards': [h['root'] for h in headers]}
+    return _write_stream(merge_manifests(manifest_paths), output_path, header)
+
+
+def _common_root(headers):
+    roots = [h['root'] for h in headers]
+    if not roots:
+        return ''
+    if len(roots) == 1:
+        return roots[0]
+    return Path(os.path.commonpath(roots)).as_posix()
+
+
+def count_file_names(rows, name_counts=None):
+    """Add the lowercase names of the file rows to a Counter."""
+    if name_counts is None:
+        name_counts = Counter()
+    name_counts.update(row['Name'].lower() for row in rows if row['Type'] == 'File')
+    return name_counts
+
+
+def find_manifest_duplicates(manifest_paths, name_counts=None):
+    """
+    Filename duplicates across all shards.
+
+    Without name_counts (lowercase file name counts from an earlier pass,
+    see count_file_names()) a first streaming pass counts the names. The
+    next pass keeps the rows whose name occurs more than once.
+
+    Returns:
+        pd.DataFrame: Same columns as format_duplicate_results()
+    """
+    if name_counts is None:
+        name_counts = count_file_names(merge_manifests(manifest_paths))
+    rows = [
+        row for row in merge_manifests(manifest_paths)
+        if row['Type'] == 'File' and name_counts[row['Name'].lower()] > 1
+    ]
+    del name_counts
+    if not rows:
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+    files = pd.DataFrame(rows)
+    return build_duplicate_frame(files, files['Name'].str.lower())
+
+
+def _combine_extension_summaries(partials):
+    if not partials:
+        return summarize_by_extension([])
+    combined = pd.concat(partials).groupby('Extension', sort=False).agg({
+        'Files': 'sum',
+        'Total_Size_Bytes': 'sum',
+        'Unique_Size_Bytes': 'sum',
+        'Largest_Size_Bytes': 'max',
+    }).reset_index()
+    combined['Average_Size_Bytes'] = combined['Total_Size_Bytes'] / combined['Files']
+    total = combined['Total_Size_Bytes'].sum()
+    combined['Share_of_Total'] = combined['Total_Size_Bytes'] / total if total else 0.0
+    return combined[list(summarize_by_extension([]).columns)] \
+        .sort_values('Total_Size_Bytes', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _combine_depth_summaries(partials):
+    if not partials:
+        return summarize_by_depth([], '')
+    combined = pd.concat(partials).groupby('Depth')[['Folders', 'Files', 'Total_Size_Bytes']].sum().reset_index()
+    combined['Cumulative_Size_Bytes'] = combined['Total_Size_Bytes'].cumsum()
+    return combined
+
+
+class _SplitSheet:
+    """Write-only sheet that continues on 'Title (2)', 'Title (3)', ... past Excel's row limit."""
+
+    def __init__(self, workbook, title, columns):
+        self.workbook = workbook
+        self.title = title
+        self.columns = list(columns)
+        self.sheet_number = 0
+        self._next_sheet()
+
+    def _next_sheet(self):
+        self.sheet_number += 1
+        title = self.title if self.sheet_number == 1 else f'{self.title} ({self.sheet_number})'
+        self.sheet = self.workbook.create_sheet(title)
+        self.sheet.append(self.columns)
+        self.sheet_rows = 0
+
+    def append(self, values):
+        if self.sheet_rows >= MAX_SHEET_ROWS:
+            self._next_sheet()
+        self.sheet.append(values)
+        self.sheet_rows += 1
+
+
+def _append_frame(workbook, title, frame):
+    sheet = _SplitSheet(workbook, title, frame.columns)
+    for values in frame.itertuples(index=False, name=None):
+        sheet.append([None if pd.isna(v) else v for v in values])
+
+
+def merge_to_report(manifest_paths, report_path, chunk_rows=100000, largest_count=100):
+    """
+    Merge shards into one Excel report without loading them all at once.
+
+    Rows are streamed into a write-only workbook (continuing on extra sheets
+    past Excel's row limit, the duplicates too). Summaries are computed per chunk with the
+    vectorized report functions and combined at the end. File names are
+    counted in the same pass, so filename duplicates, which get their own
+    sheet, only need one more pass over the shards.
+
+    Returns:
+        dict: 'Entries' and 'Duplicates' counts
+
+    Raises:
+        ValueError: If the shards were scanned with different options
+    """
+    root_folder = _common_root(read_shard_headers(manifest_paths))
+    columns = ['Type', 'Name', 'Path', 'Extension', 'Size', 'Links', 'Unique Size']
+
+    workbook = Workbook(write_only=True)
+    sheet = _SplitSheet(workbook, 'Sheet1', columns)
+    extension_partials = []
+    depth_partials = []
+    largest = pd.DataFrame(columns=columns)
+    name_counts = Counter()
+    entries = 0
+
+    rows = merge_manifests(manifest_paths)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        entries += len(chunk)
+        count_file_names(chunk, name_counts)
+        for row in chunk:
+            sheet.append([row.get(column) for column in columns])
+
+        frame = pd.DataFrame(chunk, columns=columns)
+        extension_partials.append(summarize_by_extension(frame))
+        depth_partials.append(summarize_by_depth(frame, root_folder))
+        # Only the largest files of each chunk can be among the overall largest
+        files = frame[frame['Type'] == 'File']
+        largest = pd.concat([largest, files]).nlargest(largest_count, 'Size') if not largest.empty else files.nlargest(largest_count, 'Size')
+
+    duplicates = find_manifest_duplicates(manifest_paths, name_counts)
+    del name_counts
+    _append_frame(workbook, 'Duplicates', duplicates)
+    _append_frame(workbook, 'By Extension', _combine_extension_summaries(extension_partials))
+    _append_frame(workbook, 'By Depth', _combine_depth_summaries(depth_partials))
+    _append_frame(workbook, 'Largest Files', largest_files(largest, largest_count))
+    workbook.save(report_path)
+
+    return {'Entries': entries, 'Duplicates': len(duplicates)}
+
+
+def _split_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.manifest', description="Scan to and merge FolderScanner manifests.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help="Scan a folder into a manifest shard")
+    scan.add_argument('root')
+    scan.add_argument('manifest')
+    scan.add_argument('--include-files', action='store_true')
+    scan.add_argument('--extensions', help="Comma-separated, e.g. .pdf,.docx")
+    scan.add_argument('--exclude', help="Comma-separated folder names to skip")
+    scan.add_argument('--follow-symlinks', action='store_true')
+    scan.add_argument('--one-filesystem', action='store_true')
+
+    merge = commands.add_parser('merge', help="Merge manifest shards into one report")
+    merge.add_argument('report', help="Excel report to write")
+    merge.add_argument('manifests', nargs='+')
+    merge.add_argument('--output-manifest', help="Also write the merged manifest here")
+
+    args = parser.parse_args(argv)
+    if args.command == 'scan':
+        count = scan_to_manifest(
+            args.root, args.manifest, args.include_files, _split_list(args.extensions), _split_list(args.exclude),
+            follow_symlinks=args.follow_symlinks, one_filesystem=args.one_filesystem
+        )
+        print(f"Wrote {count:,} entries to {args.manifest}")
+    else:
+        stats = merge_to_report(args.manifests, args.report)
+        print(f"Merged {stats['Entries']:,} entries ({stats['Duplicates']:,} duplicate files) into {args.report}")
+        if args.output_manifest:
+            merge_to_manifest(args.manifests, args.output_manifest)
+            print(f"Wrote merged manifest to {args.output_manifest}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,19 +1,34 @@
 import os
-import shutil
 from pathlib import Path
+from src.throttle import copy_file, stat_file
+from src.dedup import ContentIndex, link_file, remove_existing
+from src.traversal import walk_tree
 
-def replicate_folder_structure(source, destination, include_files=False, extensions=None, excluded_folders=None):
+
+def _index_resumed_rows(content_index, rows):
+    # Files copied before an interruption can still serve as link targets
+    for row in rows:
+        if row.get('Status') == 'File Copied' and 'Size' in row:
+            content_index.add(row['Source Path'], row['Destination Path'], row['Size'], row.get('Hash'))
+
+
+def replicate_folder_structure(source, destination, include_files=False, extensions=None, excluded_folders=None, throttle=None, journal=None,
+                               dedup=False, link_mode='auto', follow_symlinks=False, one_filesystem=False, progress=None):
     replicated = []
-    
-    # Convert excluded folders to lowercase for case-insensitive matching
-    if excluded_folders:
-        excluded_folders = [folder.strip().lower() for folder in excluded_folders if folder.strip()]
-    else:
-        excluded_folders = []
+    content_index = ContentIndex(throttle) if dedup else None
+
+    for dirpath, dirnames, filenames in walk_tree(source, excluded_folders, follow_symlinks, one_filesystem, throttle):
+        # Reuse rows of directories finished before an interruption
+        dir_key = Path(dirpath).as_posix()
+        if journal and dir_key in journal.completed_dirs:
+            replicated.extend(journal.completed_dirs[dir_key])
+            if dedup:
+                _index_resumed_rows(content_index, journal.completed_dirs[dir_key])
+            if progress:
+                progress(len(replicated))
+            continue
 
-    for dirpath, dirnames, filenames in os.walk(source):
-        # Remove excluded folders from dirnames to prevent os.walk from traversing them
-        dirnames[:] = [d for d in dirnames if d.lower() not in excluded_folders]
+        rows = []
         # Replicate folders
         for dirname in dirnames:
             source_path = Path(os.path.join(dirpath, dirname)).as_posix()
@@ -24,7 +39,7 @@ def replicate_folder_structure(source, destination, include_files=False, extensi
                 status = 'Folder Replicated'
             except Exception as e:
                 status = f'Folder Failed: {e}'
-            replicated.append({
+            rows.append({
                 'Type': 'Folder',
                 'Name': dirname,
                 'Source Path': source_path,
@@ -47,20 +62,54 @@ def replicate_folder_structure(source, destination, include_files=False, extensi
                 dest_file = Path(os.path.join(destination, relative_file_path)).as_posix()
                 dest_folder = os.path.dirname(dest_file)
 
+                # Skip files already copied before an interruption
+                if journal and source_file in journal.completed_files:
+                    rows.append(journal.completed_files[source_file])
+                    if dedup:
+                        _index_resumed_rows(content_index, [journal.completed_files[source_file]])
+                    continue
+
+                file_size = None
+                digest = None
                 try:
                     os.makedirs(dest_folder, exist_ok=True)
-                    shutil.copy2(source_file, dest_file)
                     status = 'File Copied'
+                    if dedup:
+                        # Link to an identical file that was already copied, copy if that fails
+                        file_size = stat_file(source_file, throttle).st_size
+                        existing_file, digest = content_index.find(source_file, file_size)
+                        if existing_file and link_file(existing_file, dest_file, link_mode, source_file):
+                            status = 'File Linked'
+                    if status == 'File Copied':
+                        # An earlier run may have hardlinked dest_file, copying in place would change its siblings too
+                        if dedup or (os.path.isfile(dest_file) and os.stat(dest_file).st_nlink > 1):
+                            remove_existing(dest_file)
+                        copy_file(source_file, dest_file, throttle)
+                        if dedup:
+                            content_index.add(source_file, dest_file, file_size, digest)
                 except Exception as e:
                     status = f'File Failed: {e}'
 
-                replicated.append({
+                row = {
                     'Type': 'File',
                     'Name': filename,
                     'Source Path': source_file,
                     'Destination Path': dest_file,
                     'Extension': file_ext,
                     'Status': status
-                })
+                }
+                if dedup:
+                    row['Size'] = file_size
+                    row['Hash'] = digest
+                rows.append(row)
+                if journal and status in ('File Copied', 'File Linked'):
+                    journal.record_file(source_file, row)
+
+        replicated.extend(rows)
+        # Only checkpoint a directory when nothing in it failed, so a resume retries failures
+        if journal and not any('Failed' in row['Status'] for row in rows):
+            journal.record_dir(dir_key, rows)
+        if progress:
+            progress(len(replicated))
 
     return replicated
@@ -0,0 +1,95 @@
+from pathlib import Path
+import pandas as pd
+
+
+def to_frame(data):
+    return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+
+def _file_rows(frame):
+    if frame.empty or 'Type' not in frame.columns:
+        return frame.iloc[0:0]
+    files = frame[frame['Type'] == 'File']
+    if 'Size' not in files.columns:
+        files = files.assign(Size=0)
+    return files
+
+
+def summarize_by_extension(data):
+    """
+    Per-extension file counts and sizes, largest total first.
+
+    Args:
+        data (list or pd.DataFrame): Output of collect_folders_and_files()
+
+    Returns:
+        pd.DataFrame: One row per lowercase extension
+    """
+    files = _file_rows(to_frame(data))
+    if files.empty:
+        return pd.DataFrame(columns=['Extension', 'Files', 'Total_Size_Bytes', 'Unique_Size_Bytes',
+                                     'Average_Size_Bytes', 'Largest_Size_Bytes', 'Share_of_Total'])
+    sizes = files['Size'].fillna(0)
+    unique_sizes = files['Unique Size'].fillna(sizes) if 'Unique Size' in files.columns else sizes
+    grouped = pd.DataFrame({
+        'Extension': files['Extension'].fillna('').str.lower().replace('', '(none)'),
+        'Size': sizes,
+        'Unique': unique_sizes,
+    }).groupby('Extension', sort=False)
+
+    summary = grouped['Size'].agg(['count', 'sum', 'mean', 'max'])
+    summary['Unique'] = grouped['Unique'].sum()
+    total = summary['sum'].sum()
+    summary['Share_of_Total'] = summary['sum'] / total if total else 0.0
+    summary = summary.reset_index().rename(columns={
+        'count': 'Files',
+        'sum': 'Total_Size_Bytes',
+        'Unique': 'Unique_Size_Bytes',
+        'mean': 'Average_Size_Bytes',
+        'max': 'Largest_Size_Bytes',
+    })
+    return summary[['Extension', 'Files', 'Total_Size_Bytes', 'Unique_Size_Bytes',
+                    'Average_Size_Bytes', 'Largest_Size_Bytes', 'Share_of_Total']] \
+        .sort_values('Total_Size_Bytes', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def summarize_by_depth(data, root_folder):
+    """
+    Folder and file counts per depth below root_folder (1 = direct children).
+
+    Returns:
+        pd.DataFrame: One row per depth with cumulative totals
+    """
+    frame = to_frame(data)
+    if frame.empty or 'Path' not in frame.columns:
+        return pd.DataFrame(columns=['Depth', 'Folders', 'Files', 'Total_Size_Bytes', 'Cumulative_Size_Bytes'])
+    root_depth = Path(root_folder).as_posix().rstrip('/').count('/')
+    sizes = frame['Size'].fillna(0) if 'Size' in frame.columns else 0
+    columns = pd.DataFrame({
+        'Depth': frame['Path'].str.count('/') - root_depth,
+        'Folders': (frame['Type'] == 'Folder').astype(int),
+        'Files': (frame['Type'] == 'File').astype(int),
+        'Total_Size_Bytes': sizes,
+    })
+    summary = columns.groupby('Depth').sum().reset_index()
+    summary['Cumulative_Size_Bytes'] = summary['Total_Size_Bytes'].cumsum()
+    return summary
+
+
+def largest_files(data, count=100):
+    files = _file_rows(to_frame(data))
+    columns = [c for c in ['Name', 'Path', 'Extension', 'Size', 'Links'] if c in files.columns]
+    return files.nlargest(count, 'Size')[columns].rename(columns={'Size': 'Size_Bytes'}).reset_index(drop=True)
+
+
+def build_summary_sheets(data, root_folder, largest_count=100):
+    """
+    Returns:
+        dict: Sheet name -> DataFrame for save_to_excel(extra_sheets=...)
+    """
+    frame = to_frame(data)
+    return {
+        'By Extension': summarize_by_extension(frame),
+        'By Depth': summarize_by_depth(frame, root_folder),
+        'Largest Files': largest_files(frame, largest_count),
+    }
@@ -1,52 +1,141 @@
 
 import os
+import stat
 from pathlib import Path
+from src.throttle import stat_file
+from src.traversal import walk_tree, normalize_excluded_folders
 
-def collect_folders_and_files(root_folder, include_files=False, extensions=None, excluded_folders=None):
-    data = []
-    
-    # Convert excluded folders to lowercase for case-insensitive matching
-    if excluded_folders:
-        excluded_folders = [folder.strip().lower() for folder in excluded_folders if folder.strip()]
-    else:
-        excluded_folders = []
-
-    for dirpath, dirnames, filenames in os.walk(root_folder):
-        # Remove excluded folders from dirnames to prevent os.walk from traversing them
-        dirnames[:] = [d for d in dirnames if d.lower() not in excluded_folders]
-        # Collect folder info
-        for dirname in dirnames:
-            data.append({
-                'Type': 'Folder',
-                'Name': dirname,
-                'Path': Path(os.path.join(dirpath, dirname)).as_posix(),
-                'Extension': ''
+
+def _listed_in_tree(target, real_root, excluded_folders, extensions):
+    # True if the scan also lists the target of a file symlink under its own path
+    try:
+        parts = os.path.relpath(target, real_root).split(os.sep)
+    except ValueError:
+        return False
+    if parts[0] == os.pardir or any(part.lower() in excluded_folders for part in parts[:-1]):
+        return False
+    return not extensions or any(target.lower().endswith(ext.lower()) for ext in extensions)
+
+
+def collect_folder_rows(dirpath, dirnames, filenames, include_files=False, extensions=None, throttle=None,
+                        seen_inodes=None, real_root=None, excluded_folders=None):
+    """
+    Rows for one listed folder, as collect_folders_and_files() builds them.
+
+    Args:
+        seen_inodes (set): Inodes already counted in this scan; updated in place.
+        real_root (str): Resolved scan root, to tell whether a file symlink's target is listed too.
+        excluded_folders (list): Normalized excluded folder names of the scan.
+    """
+    if seen_inodes is None:
+        seen_inodes = set()
+    if real_root is None:
+        real_root = os.path.realpath(dirpath)
+    excluded = excluded_folders or []
+
+    rows = []
+    # Collect folder info
+    for dirname in dirnames:
+        rows.append({
+            'Type': 'Folder',
+            'Name': dirname,
+            'Path': Path(os.path.join(dirpath, dirname)).as_posix(),
+            'Extension': ''
+        })
+
+    # Collect file info if enabled
+    if include_files:
+        for filename in filenames:
+            file_ext = os.path.splitext(filename)[1]
+
+            # Skip if extensions filter is applied and file doesn't match
+            if extensions and not any(filename.lower().endswith(ext.lower()) for ext in extensions):
+                continue
+
+            file_path = Path(os.path.join(dirpath, filename)).as_posix()
+
+            # Get file size and link count
+            try:
+                st = stat_file(file_path, throttle, follow_symlinks=False)
+                is_link = stat.S_ISLNK(st.st_mode)
+                if is_link:
+                    st = stat_file(file_path, throttle)
+                file_size = st.st_size
+                links = st.st_nlink
+                inode = (st.st_dev, st.st_ino)
+                if is_link and _listed_in_tree(os.path.realpath(file_path), real_root, excluded, extensions):
+                    # Counted where the target itself is listed, whichever comes first
+                    unique_size = 0
+                else:
+                    unique_size = 0 if inode in seen_inodes else file_size
+                    if links > 1 or is_link:
+                        seen_inodes.add(inode)
+            except OSError:
+                file_size = 0
+                links = 1
+                unique_size = 0
+
+            rows.append({
+                'Type': 'File',
+                'Name': filename,
+                'Path': file_path,
+                'Extension': file_ext,
+                'Size': file_size,
+                'Links': links,
+                'Unique Size': unique_size
             })
 
-        # Collect file info if enabled
-        if include_files:       
-            for filename in filenames:
-                file_ext = os.path.splitext(filename)[1]
-
-                # Skip if extensions filter is applied and file doesn't match
-                if extensions and not any(filename.lower().endswith(ext.lower()) for ext in extensions):
-                    continue
-
-                file_path = Path(os.path.join(dirpath, filename)).as_posix()
-                
-                # Get file size
-                try:
-                    file_size = os.path.getsize(file_path)
-                except OSError:
-                    file_size = 0
-
-                data.append({
-                    'Type': 'File',
-                    'Name': filename,
-                    'Path': file_path,
-                    'Extension': file_ext,
-                    'Size': file_size
-                })
+
+    return rows
+
+
+def collect_folders_and_files(root_folder, include_files=False, extensions=None, excluded_folders=None, throttle=None, journal=None,
+                              follow_symlinks=False, one_filesystem=False, progress=None):
+    data = []
+    # Inodes already counted, so hardlinked files only add their size once. Only files that
+    # can be reached twice (several links, or through a file symlink) are remembered
+    seen_inodes = set()
+    real_root = os.path.realpath(root_folder)
+    excluded = normalize_excluded_folders(excluded_folders)
+
+    for dirpath, dirnames, filenames in walk_tree(root_folder, excluded_folders, follow_symlinks, one_filesystem, throttle):
+        # Reuse rows of directories finished before an interruption
+        dir_key = Path(dirpath).as_posix()
+        if journal and dir_key in journal.completed_dirs:
+            rows = journal.completed_dirs[dir_key]
+            data.extend(rows)
+            # Their unique sizes are already settled, but later links to the same inodes must still be de-counted
+            for row in rows:
+                if row.get('Links', 1) > 1:
+                    try:
+                        st = stat_file(row['Path'], throttle)
+                        seen_inodes.add((st.st_dev, st.st_ino))
+                    except OSError:
+                        pass
+            if progress:
+                progress(len(data))
+            continue
+
+        rows = collect_folder_rows(dirpath, dirnames, filenames, include_files, extensions, throttle,
+                                   seen_inodes, real_root, excluded)
+        data.extend(rows)
+        if journal:
+            journal.record_dir(dir_key, rows)
+        if progress:
+            progress(len(data))
 
     return data
 
+
+def get_size_totals(data):
+    """
+    Sum file sizes of a scan.
+
+    Returns:
+        dict: 'Total Size' counts every link, 'Unique Size' counts each inode once
+    """
+    files = [item for item in data if item.get('Type') == 'File']
+    return {
+        'Total Size': sum(item.get('Size', 0) for item in files),
+        'Unique Size': sum(item.get('Unique Size', item.get('Size', 0)) for item in files),
+    }
@@ -0,0 +1,134 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to cap the rate of an I/O operation.
+
+    Args:
+        rate (float): Tokens added per second. None or 0 disables the limit.
+        capacity (float): Maximum burst size, defaults to one second of tokens.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate) if rate else 0.0
+        self.capacity = float(capacity) if capacity else max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount=1):
+        if not self.rate:
+            return
+        # Requests larger than the bucket are paid for in capacity-sized pieces
+        while amount > 0:
+            chunk = min(amount, self.capacity)
+            self._take(chunk)
+            amount -= chunk
+
+    def _take(self, amount):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class IOThrottle:
+    """
+    Shared limits for directory listings, stat calls and copy bandwidth.
+
+    One instance can be passed to any number of scans or replications
+    running in different threads; they all draw from the same buckets.
+
+    Args:
+        listings_per_second (float): Maximum directory listings per second.
+        stats_per_second (float): Maximum stat calls per second.
+        bytes_per_second (float): Maximum copy bandwidth in bytes per second.
+    """
+
+    def __init__(self, listings_per_second=None, stats_per_second=None, bytes_per_second=None, chunk_size=1024 * 1024):
+        self.listings = TokenBucket(listings_per_second)
+        self.stats = TokenBucket(stats_per_second)
+        self.bandwidth = TokenBucket(bytes_per_second)
+        # Keep chunks below the bucket size so copies stay smooth
+        if bytes_per_second:
+            chunk_size = max(1, min(chunk_size, int(bytes_per_second)))
+        self.chunk_size = chunk_size
+
+    def listing(self):
+        self.listings.consume()
+
+    def stat(self, path, follow_symlinks=True):
+        self.stats.consume()
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+    def copy_file(self, source_file, dest_file):
+        """Copy a file like shutil.copy2, pacing the data through the bandwidth bucket."""
+        if not self.bandwidth.rate:
+            return shutil.copy2(source_file, dest_file)
+        with open(source_file, 'rb') as src, open(dest_file, 'wb') as dst:
+            while True:
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                self.bandwidth.consume(len(chunk))
+                dst.write(chunk)
+        shutil.copystat(source_file, dest_file)
+        return dest_file
+
+
+def stat_file(path, throttle=None, follow_symlinks=True):
+    if throttle:
+        return throttle.stat(path, follow_symlinks)
+    return os.stat(path, follow_symlinks=follow_symlinks)
+
+
+def copy_file(source_file, dest_file, throttle=None):
+    if throttle:
+        return throttle.copy_file(source_file, dest_file)
+    return shutil.copy2(source_file, dest_file)
+
+
+# os.nice is process-wide and cumulative, so the fallback is only applied once
+_nice_applied = False
+
+
+def lower_io_priority(io_class=3):
+    """
+    Lower the I/O scheduling class of the calling thread.
+
+    Uses ``ionice`` on Linux (3 = idle, 2 = best-effort); threads started
+    afterwards inherit the class. Where that is unavailable the process
+    CPU priority is lowered instead, once per process. On platforms with
+    neither (e.g. Windows) nothing changes.
+
+    Returns:
+        bool: True if the priority is lowered
+    """
+    global _nice_applied
+    if sys.platform.startswith('linux'):
+        try:
+            subprocess.run(['ionice', '-c', str(io_class), '-p', str(threading.get_native_id())],
+                           check=True, capture_output=True)
+            return True
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    if _nice_applied:
+        return True
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        return False
+    _nice_applied = True
+    return True
@@ -0,0 +1,86 @@
+import os
+from src.throttle import stat_file
+
+
+def normalize_excluded_folders(excluded_folders):
+    # Convert excluded folders to lowercase for case-insensitive matching
+    if excluded_folders:
+        return [folder.strip().lower() for folder in excluded_folders if folder.strip()]
+    return []
+
+
+def walk_tree(root_folder, excluded_folders=None, follow_symlinks=False, one_filesystem=False, throttle=None):
+    """
+    Top-down directory walk shared by the scanner and the replicator.
+
+    Yields (dirpath, dirnames, filenames) like os.walk. Excluded folders are
+    already removed from dirnames, and callers may prune dirnames further.
+
+    Args:
+        root_folder (str): Folder to walk.
+        excluded_folders (list): Folder names to skip (case-insensitive).
+        follow_symlinks (bool): Descend into symlinked folders. Every folder is
+            keyed on (st_dev, st_ino) so loops and repeated trees are walked once.
+        one_filesystem (bool): Do not descend into folders on another device.
+        throttle (IOThrottle): Optional rate limits for listings and stats.
+    """
+    excluded_folders = normalize_excluded_folders(excluded_folders)
+    check_inodes = follow_symlinks or one_filesystem
+
+    visited = set()
+    root_dev = None
+    if check_inodes:
+        # A missing or unreadable root yields nothing, like os.walk
+        try:
+            root_stat = stat_file(root_folder, throttle)
+        except OSError:
+            return
+        root_dev = root_stat.st_dev
+        visited.add((root_stat.st_dev, root_stat.st_ino))
+    stack = [root_folder]
+
+    while stack:
+        top = stack.pop()
+        if throttle:
+            throttle.listing()
+        try:
+            with os.scandir(top) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        dirnames = []
+        filenames = []
+        symlinked = set()
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if entry.name.lower() not in excluded_folders:
+                    dirnames.append(entry.name)
+                    if entry.is_symlink():
+                        symlinked.add(entry.name)
+            else:
+                filenames.append(entry.name)
+
+        yield top, dirnames, filenames
+
+        # Push in reverse so folders are visited in listing order, like os.walk
+        for dirname in reversed(dirnames):
+            if not follow_symlinks and dirname in symlinked:
+                continue
+            path = os.path.join(top, dirname)
+            if check_inodes:
+                try:
+                    st = stat_file(path, throttle)
+                except OSError:
+                    continue
+                if one_filesystem and st.st_dev != root_dev:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key in visited:
+                    continue
+                visited.add(key)
+            stack.append(path)
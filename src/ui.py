@@ -1,13 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox
 import pandas as pd
-from src.file_io import select_folder, select_save_location, save_to_excel
-from src.scanner import collect_folders_and_files
+from src.file_io import select_folder, select_save_location, save_to_excel, get_journal_path
+from src.scanner import collect_folders_and_files, get_size_totals
 from src.replicator import replicate_folder_structure
-from src.duplicate_detector import find_duplicates, format_duplicate_results, get_duplicate_statistics
+from src.duplicate_detector import find_duplicate_frame
+from src.reports import to_frame, build_summary_sheets
+from src.verifier import verify_replica, VERIFY_LEVELS
+from src.throttle import IOThrottle, lower_io_priority
+from src.journal import Journal
+from src.estimator import estimate_tree, estimate_copy_seconds, check_free_space
 import sys
 import os
 import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -28,7 +34,7 @@ class FolderScannerApp:
         except tk.TclError:
             pass  # No icon fallback
 
-        root.geometry("600x500")
+        root.geometry("600x650")
         root.resizable(True, True)
 
         root.eval('tk::PlaceWindow . center')
@@ -41,7 +47,11 @@ class FolderScannerApp:
             "• Use the Filter text to filter by specific file types.\n"
             "• Exclude specific folders by listing their names (comma-separated).\n"
             "• Check 'Replicate Structure' to copy the folder layout elsewhere.\n"
-            "• Click 'Scan' to start.\n"
+            "• Check 'Follow Symlinks' to scan linked folders (each folder is visited once).\n"
+            "• Check 'Link Identical Files' to hardlink/reflink duplicate copies.\n"
+            "• Check 'Limit I/O' to throttle scans on shared storage.\n"
+            "• Check 'Resume' to continue an interrupted scan or replication.\n"
+            "• Click 'Scan' to start, or 'Verify Replica' to compare a replica with its source.\n"
         )
         tk.Label(root, text=guide_text, justify="left", wraplength=580, fg="blue").pack(pady=10)
 
@@ -52,6 +62,18 @@ class FolderScannerApp:
         self.extensions_var = tk.StringVar()
         self.excluded_folders_var = tk.StringVar()
         self.detect_duplicates_var = tk.BooleanVar()
+        self.limit_io_var = tk.BooleanVar()
+        self.low_priority_var = tk.BooleanVar()
+        self.listings_rate_var = tk.StringVar()
+        self.stats_rate_var = tk.StringVar()
+        self.bandwidth_var = tk.StringVar()
+        self.resume_var = tk.BooleanVar()
+        self.dedup_var = tk.BooleanVar()
+        self.follow_symlinks_var = tk.BooleanVar()
+        self.one_filesystem_var = tk.BooleanVar()
+        self.verify_level_var = tk.StringVar(value="size")
+        self.max_differences_var = tk.StringVar()
+        self.journals = []
 
         # ---------- Options Frame ----------
         options_frame = tk.Frame(root)
@@ -66,6 +88,11 @@ class FolderScannerApp:
         # Initially hidden
         
         tk.Checkbutton(options_frame, text="Replicate Structure", variable=self.replicate_var).pack(anchor="w", pady=2)
+        tk.Checkbutton(options_frame, text="Follow Symlinks", variable=self.follow_symlinks_var).pack(anchor="w", pady=2)
+        tk.Checkbutton(options_frame, text="Stay on One Filesystem", variable=self.one_filesystem_var).pack(anchor="w", pady=2)
+        tk.Checkbutton(options_frame, text="Link Identical Files", variable=self.dedup_var).pack(anchor="w", pady=2)
+        tk.Checkbutton(options_frame, text="Limit I/O", variable=self.limit_io_var).pack(anchor="w", pady=2)
+        tk.Checkbutton(options_frame, text="Resume interrupted run", variable=self.resume_var).pack(anchor="w", pady=2)
 
         # ---------- Toggle Input Fields ----------
         self.toggle_frame = tk.Frame(root)
@@ -82,6 +109,17 @@ class FolderScannerApp:
         tk.Label(self.folders_frame, text="Exclude folders (e.g. temp, cache)").pack(anchor="w")
         tk.Entry(self.folders_frame, textvariable=self.excluded_folders_var, width=50).pack(anchor="w", pady=2)
         self.folders_frame.pack_forget()
+
+        # I/O limits entry (blank means unlimited)
+        self.io_frame = tk.Frame(self.toggle_frame)
+        tk.Label(self.io_frame, text="Max folder listings per second").pack(anchor="w")
+        tk.Entry(self.io_frame, textvariable=self.listings_rate_var, width=20).pack(anchor="w", pady=2)
+        tk.Label(self.io_frame, text="Max file stats per second").pack(anchor="w")
+        tk.Entry(self.io_frame, textvariable=self.stats_rate_var, width=20).pack(anchor="w", pady=2)
+        tk.Label(self.io_frame, text="Max copy bandwidth (MB/s)").pack(anchor="w")
+        tk.Entry(self.io_frame, textvariable=self.bandwidth_var, width=20).pack(anchor="w", pady=2)
+        tk.Checkbutton(self.io_frame, text="Low I/O priority", variable=self.low_priority_var).pack(anchor="w", pady=2)
+        self.io_frame.pack_forget()
         
         
          # Detect Duplicates frame (for any additional UI elements if needed)
@@ -93,10 +131,26 @@ class FolderScannerApp:
         # ---------- Toggle Events ----------
         self.include_files_var.trace_add("write", self.toggle_extensions_input)
         self.exclude_folders_var.trace_add("write", self.toggle_folders_input)
+        self.limit_io_var.trace_add("write", self.toggle_io_input)
         self.detect_duplicates_var.trace_add("read", self.toggle_duplicate_detection)
 
         # ---------- Scan Button ----------
-        tk.Button(root, text="Scan", command=self.start_scan_thread, width=20, height=2).pack(pady=20)
+        buttons_frame = tk.Frame(root)
+        buttons_frame.pack(pady=20)
+        tk.Button(buttons_frame, text="Scan", command=self.start_scan_thread, width=20, height=2).pack(side="left", padx=5)
+        tk.Button(buttons_frame, text="Verify Replica", command=self.start_verify_thread, width=20, height=2).pack(side="left", padx=5)
+
+        # ---------- Verify Options ----------
+        verify_frame = tk.Frame(root)
+        verify_frame.pack()
+        tk.Label(verify_frame, text="Verify level").pack(side="left")
+        tk.OptionMenu(verify_frame, self.verify_level_var, *VERIFY_LEVELS).pack(side="left", padx=5)
+        tk.Label(verify_frame, text="Stop after differences").pack(side="left")
+        tk.Entry(verify_frame, textvariable=self.max_differences_var, width=8).pack(side="left", padx=5)
+
+        # ---------- Progress ----------
+        self.status_var = tk.StringVar()
+        tk.Label(root, textvariable=self.status_var, justify="left", wraplength=580).pack(pady=5)
 
     def toggle_extensions_input(self, *args):
         if self.include_files_var.get():
@@ -116,17 +170,76 @@ class FolderScannerApp:
         else:
             self.folders_frame.pack_forget()
 
+    def toggle_io_input(self, *args):
+        if self.limit_io_var.get():
+            self.io_frame.pack(fill="x", pady=5)
+        else:
+            self.io_frame.pack_forget()
+
+    def build_throttle(self):
+        if not self.limit_io_var.get():
+            return None
+
+        def rate(var, scale=1):
+            value = var.get().strip()
+            if not value:
+                return None
+            value = float(value)
+            if value <= 0:
+                raise ValueError("I/O limits must be greater than zero.")
+            return value * scale
+
+        if self.low_priority_var.get() and not lower_io_priority():
+            messagebox.showwarning("Low I/O priority", "Lowering the I/O priority is not supported on this system, continuing at normal priority.")
+        return IOThrottle(
+            listings_per_second=rate(self.listings_rate_var),
+            stats_per_second=rate(self.stats_rate_var),
+            bytes_per_second=rate(self.bandwidth_var, 1024 * 1024),
+        )
+
     def toggle_duplicate_detection(self, *args):
         if self.detect_duplicates_var.get():
             self.duplicates_frame.pack(fill="x", pady=5)
         else:
             self.duplicates_frame.pack_forget()
             
+    def open_journal(self, operation, params):
+        journal = Journal(get_journal_path(operation, params), header=params, resume=self.resume_var.get())
+        self.journals.append(journal)
+        return journal
+
+    def set_status(self, text):
+        self.root.after(0, self.status_var.set, text)
+
+    def make_progress(self, action, estimate, copy_seconds=0.0):
+        # The sampled estimate gives the first ETA, measured throughput takes over once work starts
+        total = max(estimate['Entries'], 1)
+        seconds = estimate['Seconds'] + copy_seconds
+        started = time.monotonic()
+        last_update = [0.0]
+        self.set_status(
+            f"{action}: about {total:,} entries "
+            f"(likely {estimate['Entries Low']:,} - {estimate['Entries High']:,}), "
+            f"estimated time {format_duration(seconds)}"
+        )
+
+        def progress(done):
+            now = time.monotonic()
+            if now - last_update[0] < 0.5:
+                return
+            last_update[0] = now
+            remaining = max(total - done, 0)
+            eta = (now - started) / done * remaining if done else seconds
+            self.set_status(f"{action}: {done:,} of ~{total:,} entries, about {format_duration(eta)} left")
+
+        return progress
+
     def start_scan_thread(self):
         thread = threading.Thread(target=self.start_scan, daemon=True)
         thread.start()
 
     def start_scan(self):
+        self.journals = []
         try:
             source_folder = select_folder("Select Folder to Scan")
 
@@ -141,33 +254,79 @@ class FolderScannerApp:
                 messagebox.showerror("Error", "File extensions must start with a dot (e.g., .txt, .pdf).")
                 return
 
+            try:
+                throttle = self.build_throttle()
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid I/O limit: {e}")
+                return
+
+            traversal = {
+                'follow_symlinks': self.follow_symlinks_var.get(),
+                'one_filesystem': self.one_filesystem_var.get(),
+            }
+            scan_params = {
+                **traversal,
+                'source': source_folder,
+                'include_files': include_files,
+                'extensions': extensions,
+                'excluded_folders': excluded_folders,
+            }
+
+            self.set_status("Estimating size...")
+            estimate = estimate_tree(
+                source_folder, include_files, extensions, excluded_folders, traversal['follow_symlinks'],
+                traversal['one_filesystem'], throttle=throttle, journaled=True
+            )
+
             if replicate and not include_files:
                 # Replicate folder structure only (no files)
                 save_location = select_save_location(report_type="replication")
                 dest_folder = select_folder("Select Destination for Replication")
+                journal = self.open_journal("replication", dict(scan_params, destination=dest_folder))
                 results = replicate_folder_structure(
-                    source_folder, dest_folder, include_files, extensions, excluded_folders
+                    source_folder, dest_folder, include_files, extensions, excluded_folders, throttle, journal, **traversal,
+                    progress=self.make_progress("Replicating", estimate)
                 )
                 pd.DataFrame(results).to_excel(save_location, index=False)
                 message = f"Folder replication completed successfully.\nReport has been saved to:\n{save_location}"
                       
                         
             elif include_files and replicate:
-                data = collect_folders_and_files(source_folder, include_files, extensions, excluded_folders)
-                save_location = select_save_location(report_type="replication files too")
                 dest_folder = select_folder("Select Destination for Replication")
+                enough_space, free_bytes = check_free_space(dest_folder, estimate['Bytes'])
+                if not enough_space and not messagebox.askyesno(
+                    "Not enough space",
+                    f"The destination has {free_bytes:,} bytes free but about {estimate['Bytes']:,} bytes "
+                    f"({estimate['Bytes Low']:,} - {estimate['Bytes High']:,}) will be copied.\n"
+                    f"Continue anyway?"
+                ):
+                    self.set_status("")
+                    return
+
+                self.set_status("Measuring copy speed...")
+                copy_seconds = estimate_copy_seconds(estimate, dest_folder, throttle)
+
+                data = collect_folders_and_files(
+                    source_folder, include_files, extensions, excluded_folders, throttle, self.open_journal("scan", scan_params), **traversal,
+                    progress=self.make_progress("Scanning", estimate)
+                )
+                save_location = select_save_location(report_type="replication files too")
+                dedup = self.dedup_var.get()
+                journal = self.open_journal("replication", dict(scan_params, destination=dest_folder, dedup=dedup))
                 results = replicate_folder_structure(
-                    source_folder, dest_folder, include_files, extensions, excluded_folders
+                    source_folder, dest_folder, include_files, extensions, excluded_folders, throttle, journal, dedup=dedup, **traversal,
+                    progress=self.make_progress("Replicating", estimate, copy_seconds)
                 )
                 
-                duplicates = find_duplicates(data)
-                if duplicates:
+                frame = to_frame(data)
+                summary_sheets = build_summary_sheets(frame, source_folder)
+                duplicate_results = find_duplicate_frame(frame)
+                if not duplicate_results.empty:
                     save_location = select_save_location(report_type="duplicates")
-                    duplicate_results = format_duplicate_results(duplicates)
-                    stats = get_duplicate_statistics(duplicates)
+                    stats = len(duplicate_results)
                     
                     # Save duplicate results
-                    save_to_excel(duplicate_results, save_location)
+                    save_to_excel(duplicate_results, save_location, summary_sheets)
                     
                     message = (
                         f"Duplicate detection completed successfully.\n"
@@ -177,22 +336,26 @@ class FolderScannerApp:
                 else:
                     # No duplicates found, save regular scan
                     save_location = select_save_location(report_type="structure")
-                    save_to_excel(results, save_location)
+                    save_to_excel(results, save_location, summary_sheets)
                     message = f"No duplicate files found.\nRegular scan report has been saved to:\n{save_location}"
                                   
             else:
                 
-                data = collect_folders_and_files(source_folder, include_files, extensions, excluded_folders)
+                data = collect_folders_and_files(
+                    source_folder, include_files, extensions, excluded_folders, throttle, self.open_journal("scan", scan_params), **traversal,
+                    progress=self.make_progress("Scanning", estimate)
+                )
+                frame = to_frame(data)
+                summary_sheets = build_summary_sheets(frame, source_folder) if include_files else None
                 if detect_duplicates and include_files:
                     # Find duplicates and format results
-                    duplicates = find_duplicates(data)
-                    if duplicates:
+                    duplicate_results = find_duplicate_frame(frame)
+                    if not duplicate_results.empty:
                         save_location = select_save_location(report_type="duplicates")
-                        duplicate_results = format_duplicate_results(duplicates)
-                        stats = get_duplicate_statistics(duplicates)
+                        stats = len(duplicate_results)
                         
                         # Save duplicate results
-                        save_to_excel(duplicate_results, save_location)
+                        save_to_excel(duplicate_results, save_location, summary_sheets)
                         
                         message = (
                             f"Duplicate detection completed successfully.\n"
@@ -202,22 +365,98 @@ class FolderScannerApp:
                     else:
                         # No duplicates found, save regular scan
                         save_location = select_save_location(report_type="structure")
-                        save_to_excel(data, save_location)
+                        save_to_excel(frame, save_location, summary_sheets)
                         message = f"No duplicate files found.\nRegular scan report has been saved to:\n{save_location}"
                 else:
                     # Regular scan without duplicate detection
                     save_location = select_save_location(report_type="structure")
-                    save_to_excel(data, save_location)
+                    save_to_excel(frame, save_location, summary_sheets)
                     message = f"Scan completed successfully.\nReport has been saved to:\n{save_location}"
+                    if include_files:
+                        totals = get_size_totals(data)
+                        message += (
+                            f"\n\nTotal size: {totals['Total Size']:,} bytes"
+                            f"\nUnique size (hardlinks counted once): {totals['Unique Size']:,} bytes"
+                        )
 
+            # Reports are saved, checkpoints are no longer needed
+            for journal in self.journals:
+                journal.discard()
+            self.set_status("")
             messagebox.showinfo("Completed", message)
                 
 
         except FileNotFoundError:
+            self.set_status("")
             messagebox.showwarning("Cancelled", "Operation cancelled.")
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred:\n{e}")
+            hint = "\nProgress was checkpointed, tick 'Resume' to continue." if self.journals else ""
+            messagebox.showerror("Error", f"An error occurred:\n{e}{hint}")
             self.root.destroy()
+        finally:
+            for journal in self.journals:
+                journal.close()
+
+    def start_verify_thread(self):
+        thread = threading.Thread(target=self.start_verify, daemon=True)
+        thread.start()
+
+    def start_verify(self):
+        try:
+            source_folder = select_folder("Select Source Folder")
+            dest_folder = select_folder("Select Replica to Verify")
+
+            # A replica is only verified if its files are compared, so files are always included here;
+            # the extension filter still applies when 'Include files' is set
+            extensions = [e.strip() for e in self.extensions_var.get().split(',') if e.strip()] if self.include_files_var.get() else None
+            excluded_folders = [f.strip() for f in self.excluded_folders_var.get().split(',') if f.strip()] if self.exclude_folders_var.get() else None
+            scope = f"Folders and {', '.join(extensions)} files" if extensions else "Folders and files"
+            max_differences = self.max_differences_var.get().strip()
+            try:
+                max_differences = int(max_differences) if max_differences else None
+                throttle = self.build_throttle()
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid option: {e}")
+                return
+
+            self.set_status("Verifying replica...")
+            differences, stats = verify_replica(
+                source_folder, dest_folder, self.verify_level_var.get(), True, extensions, excluded_folders,
+                self.follow_symlinks_var.get(), self.one_filesystem_var.get(), max_differences, throttle
+            )
+            self.set_status("")
+
+            if not differences:
+                messagebox.showinfo("Completed", f"Replica matches the source.\n{scope}: {stats['Compared']:,} entries compared.")
+                return
+
+            save_location = select_save_location(report_type="verification")
+            save_to_excel(differences, save_location)
+            stopped = "\nStopped early after reaching the difference limit." if stats['Stopped Early'] else ""
+            messagebox.showinfo(
+                "Completed",
+                f"Replica differs from the source ({scope.lower()} compared).\n"
+                f"Missing: {stats['Missing']:,}, Extra: {stats['Extra']:,}, Mismatched: {stats['Mismatched']:,}{stopped}\n"
+                f"Report has been saved to:\n{save_location}"
+            )
+
+        except FileNotFoundError:
+            self.set_status("")
+            messagebox.showwarning("Cancelled", "Operation cancelled.")
+        except Exception as e:
+            self.set_status("")
+            messagebox.showerror("Error", f"An error occurred:\n{e}")
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
 
 
 def ask_user_choice():
@@ -0,0 +1,215 @@
+import os
+from pathlib import Path
+from src.dedup import file_digest
+from src.throttle import stat_file
+from src.traversal import normalize_excluded_folders
+
+VERIFY_LEVELS = ('exists', 'size', 'content')
+
+
+def _listing(folder, throttle):
+    if throttle:
+        throttle.listing()
+    try:
+        with os.scandir(folder) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def _is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _difference(kind, relative_path, source_path, dest_path, item_type, detail=''):
+    return {
+        'Type': item_type,
+        'Relative Path': relative_path,
+        'Difference': kind,
+        'Source Path': Path(source_path).as_posix() if source_path else '',
+        'Destination Path': Path(dest_path).as_posix() if dest_path else '',
+        'Detail': detail,
+    }
+
+
+def _compare_files(source_entry, dest_entry, level, mtime_tolerance, throttle):
+    if level == 'exists':
+        return None
+    try:
+        source_stat = stat_file(source_entry.path, throttle)
+        dest_stat = stat_file(dest_entry.path, throttle)
+    except OSError as e:
+        return f'Stat failed: {e}'
+    if source_stat.st_size != dest_stat.st_size:
+        return f'Size {source_stat.st_size} != {dest_stat.st_size}'
+    if level == 'size':
+        # A hardlinked replica file (see 'File Linked') shares its modified time with the file it links to
+        hardlinked = dest_stat.st_nlink > 1
+        if not hardlinked and abs(source_stat.st_mtime - dest_stat.st_mtime) > mtime_tolerance:
+            return 'Modified time differs'
+        return None
+    try:
+        if file_digest(source_entry.path, throttle) != file_digest(dest_entry.path, throttle):
+            return 'Content differs'
+    except OSError as e:
+        return f'Read failed: {e}'
+    return None
+
+
+def iter_differences(source, destination, level='size', include_files=True, extensions=None, excluded_folders=None,
+                     follow_symlinks=False, one_filesystem=False, mtime_tolerance=2.0, throttle=None, counters=None):
+    """
+    Stream the differences between a source tree and its replica.
+
+    Both trees are walked together and each pair of folders is compared
+    as a merge-join of their sorted listings, so memory depends on the
+    size of single folders, not on the size of the trees.
+
+    Args:
+        source (str): Original folder.
+        destination (str): Replica to check.
+        level (str): 'exists', 'size' (size and modified time) or 'content' (size and SHA-256).
+            Hardlinked replica files, as made by dedup replication, only have their size checked at 'size'.
+        include_files (bool): Compare files, not only folders.
+        extensions (list): Only compare files with these extensions.
+        excluded_folders (list): Folder names skipped on both sides.
+        follow_symlinks (bool): Descend into symlinked source folders. Like walk_tree, each
+            (st_dev, st_ino) is descended once, so loops and repeated trees are not reported as missing.
+        one_filesystem (bool): Do not descend into source folders on another device, as the
+            replication did not either.
+        mtime_tolerance (float): Seconds of modified time drift accepted at the 'size' level.
+        counters (dict): Optional dict that receives the 'Compared' entry count.
+
+    Yields:
+        dict: One row per missing, extra or mismatched entry
+    """
+    if level not in VERIFY_LEVELS:
+        raise ValueError(f"Unknown verification level '{level}', expected one of {', '.join(VERIFY_LEVELS)}")
+    excluded_folders = normalize_excluded_folders(excluded_folders)
+    if counters is None:
+        counters = {}
+    counters.setdefault('Compared', 0)
+
+    def wanted(entry, is_dir):
+        if is_dir:
+            return entry.name.lower() not in excluded_folders
+        if not include_files:
+            return False
+        return not extensions or any(entry.name.lower().endswith(ext.lower()) for ext in extensions)
+
+    if not os.path.isdir(destination):
+        yield _difference('Missing', '.', source, destination, 'Folder')
+        return
+
+    check_inodes = follow_symlinks or one_filesystem
+    visited = set()
+    root_dev = None
+    if check_inodes:
+        try:
+            root_stat = stat_file(source, throttle)
+            root_dev = root_stat.st_dev
+            visited.add((root_stat.st_dev, root_stat.st_ino))
+        except OSError:
+            pass
+
+    stack = [(source, destination, '')]
+    while stack:
+        source_dir, dest_dir, relative_dir = stack.pop()
+        source_listing = _listing(source_dir, throttle)
+        source_entries = sorted(source_listing, key=lambda entry: entry.name)
+        dest_entries = sorted(_listing(dest_dir, throttle), key=lambda entry: entry.name)
+        pending_dirs = {}
+        i = j = 0
+
+        while i < len(source_entries) or j < len(dest_entries):
+            source_entry = source_entries[i] if i < len(source_entries) else None
+            dest_entry = dest_entries[j] if j < len(dest_entries) else None
+
+            if dest_entry is None or (source_entry is not None and source_entry.name < dest_entry.name):
+                i += 1
+                is_dir = _is_dir(source_entry)
+                if wanted(source_entry, is_dir):
+                    relative_path = f'{relative_dir}{source_entry.name}'
+                    yield _difference('Missing', relative_path, source_entry.path, None, 'Folder' if is_dir else 'File')
+                continue
+            if source_entry is None or dest_entry.name < source_entry.name:
+                j += 1
+                is_dir = _is_dir(dest_entry)
+                if wanted(dest_entry, is_dir):
+                    relative_path = f'{relative_dir}{dest_entry.name}'
+                    yield _difference('Extra', relative_path, None, dest_entry.path, 'Folder' if is_dir else 'File')
+                continue
+
+            i += 1
+            j += 1
+            source_is_dir = _is_dir(source_entry)
+            dest_is_dir = _is_dir(dest_entry)
+            if not wanted(source_entry, source_is_dir):
+                continue
+            counters['Compared'] += 1
+            relative_path = f'{relative_dir}{source_entry.name}'
+            item_type = 'Folder' if source_is_dir else 'File'
+
+            if source_is_dir != dest_is_dir:
+                detail = 'Folder in source, file in replica' if source_is_dir else 'File in source, folder in replica'
+                yield _difference('Mismatched', relative_path, source_entry.path, dest_entry.path, item_type, detail)
+            elif source_is_dir:
+                if follow_symlinks or not source_entry.is_symlink():
+                    pending_dirs[source_entry.name] = (source_entry.path, dest_entry.path, relative_path + '/')
+            else:
+                detail = _compare_files(source_entry, dest_entry, level, mtime_tolerance, throttle)
+                if detail:
+                    yield _difference('Mismatched', relative_path, source_entry.path, dest_entry.path, item_type, detail)
+
+        if not check_inodes:
+            # Reverse so subfolders are compared in sorted order
+            stack.extend(reversed(list(pending_dirs.values())))
+            continue
+        # Claim targets in the same listing order as walk_tree did while replicating,
+        # so the copy of a repeated folder that was filled is the one compared
+        for entry in reversed(source_listing):
+            if not _is_dir(entry) or not wanted(entry, True):
+                continue
+            if not follow_symlinks and entry.is_symlink():
+                continue
+            try:
+                st = stat_file(entry.path, throttle)
+            except OSError:
+                continue
+            if one_filesystem and st.st_dev != root_dev:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in visited:
+                continue
+            visited.add(key)
+            if entry.name in pending_dirs:
+                stack.append(pending_dirs[entry.name])
+
+
+def verify_replica(source, destination, level='size', include_files=True, extensions=None, excluded_folders=None,
+                   follow_symlinks=False, one_filesystem=False, max_differences=None, throttle=None):
+    """
+    Compare a replica with its source and collect the differences.
+
+    Args:
+        max_differences (int): Stop once more than this many differences were found.
+
+    Returns:
+        tuple: (list of difference rows, dict with 'Compared', 'Missing', 'Extra',
+            'Mismatched' counts and 'Stopped Early')
+    """
+    counters = {'Compared': 0}
+    differences = []
+    stats = {'Missing': 0, 'Extra': 0, 'Mismatched': 0, 'Stopped Early': False}
+    for difference in iter_differences(source, destination, level, include_files, extensions, excluded_folders,
+                                       follow_symlinks, one_filesystem, throttle=throttle, counters=counters):
+        differences.append(difference)
+        stats[difference['Difference']] += 1
+        if max_differences is not None and len(differences) > max_differences:
+            stats['Stopped Early'] = True
+            break
+    stats['Compared'] = counters['Compared']
+    return differences, stats
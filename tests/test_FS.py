@@ -2,13 +2,31 @@ import unittest
 import tempfile
 import os
 import shutil
+import subprocess
+import sys
+import time
 import pandas as pd
 from pathlib import Path
 
-from src.scanner import collect_folders_and_files
+from src.scanner import collect_folders_and_files, get_size_totals
 from src.replicator import replicate_folder_structure
 from src.file_io import save_to_excel
-from src.duplicate_detector import get_file_name, find_duplicates, format_duplicate_results, get_duplicate_statistics
+from src.duplicate_detector import get_file_name, find_duplicates, format_duplicate_results, get_duplicate_statistics, find_duplicate_frame, \
+    DUPLICATE_COLUMNS
+from src.throttle import TokenBucket, IOThrottle, lower_io_priority
+import src.throttle as throttle_module
+import src.estimator as estimator_module
+import src.traversal as traversal_module
+import src.verifier as verifier_module
+from unittest import mock
+from src.journal import Journal
+from src.dedup import file_digest
+from src.estimator import estimate_tree, estimate_copy_seconds, check_free_space
+from src.verifier import verify_replica
+from src.manifest import write_manifest, iter_manifest, read_manifest_header, merge_manifests, merge_to_report, \
+    merge_to_manifest, scan_to_manifest
+import src.manifest as manifest_module
+from src.reports import summarize_by_extension, summarize_by_depth, largest_files, build_summary_sheets
 
 
 class TestFolderScanner(unittest.TestCase):
@@ -52,6 +70,11 @@ class TestFolderScanner(unittest.TestCase):
             self.assertIn('Size', file_entry)
             self.assertIsInstance(file_entry['Size'], int)
 
+    def test_scan_missing_root(self):
+        missing = os.path.join(self.test_dir, "does_not_exist")
+        self.assertEqual(collect_folders_and_files(missing, include_files=True), [])
+        self.assertEqual(collect_folders_and_files(missing, include_files=True, follow_symlinks=True), [])
+
     def test_scan_with_extension_filter(self):
         result = collect_folders_and_files(self.test_dir, include_files=True, extensions=[".pdf"])
         file_names = [item['Name'] for item in result if item['Type'] == 'File']
@@ -286,7 +309,7 @@ class TestDuplicateDetector(unittest.TestCase):
         self.assertEqual(len(results), 2)
         
         # Check structure of results
-        for result in results:
+        for result in results.to_dict('records'):
             self.assertIn('Duplicate_Group', result)
             self.assertIn('File_Number', result)
             self.assertIn('Total_in_Group', result)
@@ -298,12 +321,45 @@ class TestDuplicateDetector(unittest.TestCase):
             self.assertIn('Hash', result)
         
         # Both files should be in the same group
-        self.assertEqual(results[0]['Duplicate_Group'], results[1]['Duplicate_Group'])
-        self.assertEqual(results[0]['Total_in_Group'], 2)
-        self.assertEqual(results[1]['Total_in_Group'], 2)
+        self.assertEqual(results.loc[0, 'Duplicate_Group'], results.loc[1, 'Duplicate_Group'])
+        self.assertEqual(list(results['File_Number']), [1, 2])
+        self.assertEqual(list(results['Total_in_Group']), [2, 2])
         # Hash should contain the filename for filename-based duplicate detection
-        self.assertEqual(results[0]['Hash'], 'document.txt')
-        self.assertEqual(results[1]['Hash'], 'document.txt')
+        self.assertEqual(list(results['Hash']), ['document.txt', 'document.txt'])
+
+    def test_format_duplicate_results_speed(self):
+        duplicates = {
+            f'file{i}.txt': [
+                {'Type': 'File', 'Name': f'file{i}.txt', 'Path': f'/path{j}/file{i}.txt', 'Extension': '.txt', 'Size': j}
+                for j in range(2)
+            ]
+            for i in range(100000)
+        }
+
+        # The plain per-row loop format_duplicate_results replaced
+        started = time.perf_counter()
+        expected = [
+            {'Duplicate_Group': group_id, 'File_Number': number, 'Total_in_Group': len(files),
+             'Type': file_info.get('Type', 'File'), 'Name': file_info.get('Name'), 'Path': file_info.get('Path'),
+             'Extension': file_info.get('Extension'), 'Size_Bytes': file_info.get('Size'), 'Hash': filename}
+            for group_id, (filename, files) in enumerate(duplicates.items(), 1)
+            for number, file_info in enumerate(files, 1)
+        ]
+        loop_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = format_duplicate_results(duplicates)
+        format_seconds = time.perf_counter() - started
+
+        self.assertEqual(results.to_dict('records')[-2:], expected[-2:])
+        self.assertEqual(len(results), 200000)
+        # Generous margin for noisy machines; a per-row DataFrame round trip is about 10x slower
+        self.assertLess(format_seconds, loop_seconds * 3 + 0.2)
+
+    def test_format_empty_duplicate_results(self):
+        results = format_duplicate_results({})
+        self.assertTrue(results.empty)
+        self.assertEqual(list(results.columns), DUPLICATE_COLUMNS)
 
     def test_get_duplicate_statistics(self):
         duplicates = {
@@ -364,5 +420,655 @@ class TestDuplicateDetectorIntegration(unittest.TestCase):
         self.assertEqual(total_duplicate_files, 2)  # 2 duplicate files in 1 group
 
 
+class TestIOThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source_dir, "subfolder"))
+        with open(os.path.join(self.source_dir, "file1.txt"), "w") as f:
+            f.write("Hello")
+        with open(os.path.join(self.source_dir, "subfolder", "big.bin"), "wb") as f:
+            f.write(os.urandom(64 * 1024))
+
+    def tearDown(self):
+        shutil.rmtree(self.source_dir)
+        shutil.rmtree(self.dest_dir)
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(11):
+            bucket.consume()
+        # First token is free, the next ten need ~0.1s at 100/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_token_bucket_unlimited(self):
+        bucket = TokenBucket(rate=None)
+        start = time.monotonic()
+        for _ in range(10000):
+            bucket.consume()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_nice_fallback_applied_once(self):
+        with mock.patch.object(throttle_module.sys, 'platform', 'darwin'), \
+                mock.patch.object(throttle_module, '_nice_applied', False), \
+                mock.patch.object(throttle_module.os, 'nice', create=True) as nice:
+            self.assertTrue(lower_io_priority())
+            self.assertTrue(lower_io_priority())
+            nice.assert_called_once_with(10)
+
+    def test_unsupported_priority_reported(self):
+        with mock.patch.object(throttle_module.sys, 'platform', 'win32'), \
+                mock.patch.object(throttle_module, '_nice_applied', False), \
+                mock.patch.object(throttle_module.os, 'nice', side_effect=AttributeError, create=True):
+            self.assertFalse(lower_io_priority())
+
+    def test_scan_with_throttle(self):
+        throttle = IOThrottle(listings_per_second=1000, stats_per_second=1000)
+        result = collect_folders_and_files(self.source_dir, include_files=True, throttle=throttle)
+        file_names = [item['Name'] for item in result if item['Type'] == 'File']
+        self.assertIn("file1.txt", file_names)
+        self.assertIn("big.bin", file_names)
+
+    def test_replicate_with_bandwidth_limit(self):
+        throttle = IOThrottle(bytes_per_second=512 * 1024)
+        result = replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, throttle=throttle)
+        statuses = [item['Status'] for item in result if item['Type'] == 'File']
+        self.assertTrue(all(status == 'File Copied' for status in statuses))
+        with open(os.path.join(self.source_dir, "subfolder", "big.bin"), "rb") as f:
+            source_bytes = f.read()
+        with open(os.path.join(self.dest_dir, "subfolder", "big.bin"), "rb") as f:
+            self.assertEqual(f.read(), source_bytes)
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        self.journal_path = os.path.join(tempfile.mkdtemp(), "run.journal")
+        os.makedirs(os.path.join(self.source_dir, "a"))
+        os.makedirs(os.path.join(self.source_dir, "b"))
+        with open(os.path.join(self.source_dir, "a", "file1.txt"), "w") as f:
+            f.write("Hello")
+        with open(os.path.join(self.source_dir, "b", "file2.txt"), "w") as f:
+            f.write("World")
+
+    def tearDown(self):
+        shutil.rmtree(self.source_dir)
+        shutil.rmtree(self.dest_dir)
+        shutil.rmtree(os.path.dirname(self.journal_path))
+
+    def test_resume_skips_completed_files(self):
+        header = {'source': self.source_dir}
+        with Journal(self.journal_path, header=header) as journal:
+            first = replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, journal=journal)
+
+        # Remove a copied file; a resumed run must trust the journal and not copy it again
+        os.remove(os.path.join(self.dest_dir, "a", "file1.txt"))
+        with Journal(self.journal_path, header=header, resume=True) as journal:
+            self.assertIn(Path(self.source_dir, "a").as_posix(), journal.completed_dirs)
+            second = replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, journal=journal)
+
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "a", "file1.txt")))
+        self.assertEqual(sorted(r['Source Path'] for r in first), sorted(r['Source Path'] for r in second))
+
+    def test_resume_with_different_header_starts_over(self):
+        with Journal(self.journal_path, header={'source': 'one'}) as journal:
+            collect_folders_and_files(self.source_dir, include_files=True, journal=journal)
+        with Journal(self.journal_path, header={'source': 'two'}, resume=True) as journal:
+            self.assertEqual(journal.completed_dirs, {})
+
+    def test_resume_ignores_torn_record(self):
+        header = {'source': self.source_dir}
+        with Journal(self.journal_path, header=header) as journal:
+            expected = collect_folders_and_files(self.source_dir, include_files=True, journal=journal)
+        with open(self.journal_path, "a") as f:
+            f.write('{"dir": "/half-writ')
+
+        with Journal(self.journal_path, header=header, resume=True) as journal:
+            resumed = collect_folders_and_files(self.source_dir, include_files=True, journal=journal)
+        self.assertEqual(sorted(r['Path'] for r in expected), sorted(r['Path'] for r in resumed))
+        with open(self.journal_path) as f:
+            self.assertNotIn("half-writ", f.read())
+
+
+class TestDedupReplication(unittest.TestCase):
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source_dir, "a"))
+        os.makedirs(os.path.join(self.source_dir, "b"))
+        for path in (("a", "asset.bin"), ("b", "asset_copy.bin"), ("b", "asset.bin")):
+            with open(os.path.join(self.source_dir, *path), "w") as f:
+                f.write("same content")
+        with open(os.path.join(self.source_dir, "a", "other.bin"), "w") as f:
+            f.write("different!!!")  # Same size, different content
+
+    def tearDown(self):
+        shutil.rmtree(self.source_dir)
+        shutil.rmtree(self.dest_dir)
+
+    def test_identical_files_are_linked(self):
+        result = replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, dedup=True)
+        statuses = sorted(item['Status'] for item in result if item['Type'] == 'File')
+        self.assertEqual(statuses, ['File Copied', 'File Copied', 'File Linked', 'File Linked'])
+
+        # Every destination file still has the source content
+        for item in result:
+            if item['Type'] == 'File':
+                self.assertEqual(file_digest(item['Source Path']), file_digest(item['Destination Path']))
+
+    def test_hardlink_mode(self):
+        replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, dedup=True, link_mode='hardlink')
+        self.assertTrue(os.path.samefile(os.path.join(self.dest_dir, "b", "asset.bin"),
+                                         os.path.join(self.dest_dir, "b", "asset_copy.bin")))
+
+    def test_rerun_over_hardlinked_destination(self):
+        replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, dedup=True, link_mode='hardlink')
+        with open(os.path.join(self.source_dir, "a", "asset.bin"), "w") as f:
+            f.write("changed")
+
+        for dedup in (True, False):
+            replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True, dedup=dedup, link_mode='hardlink')
+            with open(os.path.join(self.dest_dir, "b", "asset.bin")) as f:
+                self.assertEqual(f.read(), "same content")
+            with open(os.path.join(self.dest_dir, "a", "asset.bin")) as f:
+                self.assertEqual(f.read(), "changed")
+            differences, _ = verify_replica(self.source_dir, self.dest_dir, level='content')
+            self.assertEqual(differences, [])
+
+    def test_linked_replica_passes_verification(self):
+        # Give every source file its own modified time
+        for i, path in enumerate((("a", "asset.bin"), ("b", "asset_copy.bin"), ("b", "asset.bin"), ("a", "other.bin"))):
+            os.utime(os.path.join(self.source_dir, *path), (1000000000 + i * 1000, 1000000000 + i * 1000))
+        for link_mode in ('auto', 'hardlink'):
+            dest_dir = tempfile.mkdtemp()
+            try:
+                replicate_folder_structure(self.source_dir, dest_dir, include_files=True, dedup=True, link_mode=link_mode)
+                for level in ('size', 'content'):
+                    differences, _ = verify_replica(self.source_dir, dest_dir, level=level)
+                    self.assertEqual(differences, [])
+            finally:
+                shutil.rmtree(dest_dir)
+
+    def test_without_dedup_everything_is_copied(self):
+        result = replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True)
+        statuses = [item['Status'] for item in result if item['Type'] == 'File']
+        self.assertTrue(all(status == 'File Copied' for status in statuses))
+
+
+@unittest.skipUnless(hasattr(os, "symlink") and hasattr(os, "link"), "requires symlink and hardlink support")
+class TestInodeAwareTraversal(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.outside_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "data"))
+        with open(os.path.join(self.test_dir, "data", "original.bin"), "wb") as f:
+            f.write(b"x" * 100)
+        os.link(os.path.join(self.test_dir, "data", "original.bin"), os.path.join(self.test_dir, "data", "hardlink.bin"))
+        with open(os.path.join(self.outside_dir, "linked_file.txt"), "w") as f:
+            f.write("Behind a symlink")
+        os.symlink(self.outside_dir, os.path.join(self.test_dir, "external"))
+        # Loop back to the root
+        os.symlink(self.test_dir, os.path.join(self.test_dir, "data", "loop"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.outside_dir)
+        shutil.rmtree(self.dest_dir)
+
+    def test_symlinks_not_followed_by_default(self):
+        result = collect_folders_and_files(self.test_dir, include_files=True)
+        file_names = [item['Name'] for item in result if item['Type'] == 'File']
+        self.assertNotIn("linked_file.txt", file_names)
+
+    def test_follow_symlinks_without_loops(self):
+        result = collect_folders_and_files(self.test_dir, include_files=True, follow_symlinks=True)
+        file_names = [item['Name'] for item in result if item['Type'] == 'File']
+        self.assertEqual(file_names.count("linked_file.txt"), 1)
+        self.assertEqual(file_names.count("original.bin"), 1)
+
+    def test_hardlinks_counted_once(self):
+        result = collect_folders_and_files(self.test_dir, include_files=True)
+        links = {item['Name']: item['Links'] for item in result if item['Type'] == 'File'}
+        self.assertEqual(links['original.bin'], 2)
+        self.assertEqual(links['hardlink.bin'], 2)
+
+        totals = get_size_totals(result)
+        self.assertEqual(totals['Total Size'], 200)
+        self.assertEqual(totals['Unique Size'], 100)
+
+    def test_file_symlinks_counted_once(self):
+        data_dir = os.path.join(self.test_dir, "data")
+        # Before and after the target in listing order, and two links to one file outside the tree
+        os.symlink(os.path.join(data_dir, "original.bin"), os.path.join(data_dir, "a_link.bin"))
+        os.symlink(os.path.join(data_dir, "original.bin"), os.path.join(data_dir, "z_link.bin"))
+        os.symlink(os.path.join(self.outside_dir, "linked_file.txt"), os.path.join(data_dir, "outside1.txt"))
+        os.symlink(os.path.join(self.outside_dir, "linked_file.txt"), os.path.join(data_dir, "outside2.txt"))
+
+        totals = get_size_totals(collect_folders_and_files(self.test_dir, include_files=True))
+        self.assertEqual(totals['Total Size'], 4 * 100 + 2 * 16)
+        self.assertEqual(totals['Unique Size'], 100 + 16)
+
+        # A target filtered out of the scan is counted through its symlink instead
+        os.symlink(os.path.join(data_dir, "original.bin"), os.path.join(data_dir, "link.txt"))
+        result = collect_folders_and_files(self.test_dir, include_files=True, extensions=[".txt"])
+        self.assertEqual(get_size_totals(result)['Unique Size'], 100 + 16)
+
+    def test_replicate_follows_symlinks(self):
+        replicate_folder_structure(self.test_dir, self.dest_dir, include_files=True, follow_symlinks=True)
+        self.assertTrue(os.path.isfile(os.path.join(self.dest_dir, "external", "linked_file.txt")))
+
+
+class TestEstimator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for i in range(30):
+            folder = os.path.join(self.test_dir, f"folder{i}", "nested")
+            os.makedirs(folder)
+            for j in range(3):
+                with open(os.path.join(folder, f"file{j}.txt"), "w") as f:
+                    f.write("x" * 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_small_tree_is_exact(self):
+        estimate = estimate_tree(self.test_dir, include_files=True)
+        self.assertTrue(estimate['Exact'])
+        self.assertEqual(estimate['Folders'], 60)
+        self.assertEqual(estimate['Files'], 90)
+        self.assertEqual(estimate['Bytes'], 900)
+        self.assertEqual(estimate['Entries Low'], estimate['Entries High'])
+
+    def test_sampled_estimate_within_bounds(self):
+        estimate = estimate_tree(self.test_dir, include_files=True, max_listings=20, seed=1)
+        self.assertFalse(estimate['Exact'])
+        self.assertEqual(estimate['Probes'], 30)
+        actual_entries = len(collect_folders_and_files(self.test_dir, include_files=True))
+        self.assertLessEqual(estimate['Entries Low'], actual_entries)
+        self.assertGreaterEqual(estimate['Entries High'], actual_entries)
+
+    def test_skewed_tree_estimates(self):
+        # One of 40 small folders hides almost all of the tree a few levels down
+        skewed_dir = tempfile.mkdtemp()
+        try:
+            for i in range(40):
+                os.makedirs(os.path.join(skewed_dir, f"folder{i}"))
+                with open(os.path.join(skewed_dir, f"folder{i}", "a.txt"), "w") as f:
+                    f.write("x")
+            for a in range(3):
+                for b in range(6):
+                    leaf = os.path.join(skewed_dir, "folder7", f"deep{a}", f"branch{b}")
+                    os.makedirs(leaf)
+                    for j in range(25):
+                        with open(os.path.join(leaf, f"file{j}.bin"), "w") as f:
+                            f.write("y" * 100)
+            actual_entries = len(collect_folders_and_files(skewed_dir, include_files=True))
+
+            estimates = [estimate_tree(skewed_dir, include_files=True, max_listings=40, seed=seed) for seed in range(20)]
+            self.assertFalse(any(estimate['Exact'] for estimate in estimates))
+            # Unbiased on average, and the bounds usually hold the real count
+            mean = sum(estimate['Entries'] for estimate in estimates) / len(estimates)
+            self.assertLess(abs(mean - actual_entries) / actual_entries, 0.15)
+            covered = sum(estimate['Entries Low'] <= actual_entries <= estimate['Entries High'] for estimate in estimates)
+            self.assertGreaterEqual(covered, 15)
+        finally:
+            shutil.rmtree(skewed_dir)
+
+    def test_folders_only(self):
+        estimate = estimate_tree(self.test_dir, include_files=False)
+        self.assertEqual(estimate['Files'], 0)
+        self.assertEqual(estimate['Bytes'], 0)
+
+    def test_seed_leaves_global_random_alone(self):
+        import random
+        state = random.getstate()
+        first = estimate_tree(self.test_dir, include_files=True, max_listings=20, seed=7)
+        self.assertEqual(random.getstate(), state)
+        second = estimate_tree(self.test_dir, include_files=True, max_listings=20, seed=7)
+        self.assertEqual(first['Entries'], second['Entries'])
+
+    def test_one_filesystem_skips_other_devices(self):
+        mounted = os.path.join(self.test_dir, "folder0")
+
+        def fake_stat(path, throttle=None):
+            st = os.stat(path)
+            if os.path.normpath(path) == mounted:
+                return mock.Mock(st_dev=st.st_dev + 1, st_ino=st.st_ino, st_size=st.st_size)
+            return st
+
+        with mock.patch.object(estimator_module, 'stat_file', side_effect=fake_stat):
+            estimate = estimate_tree(self.test_dir, include_files=True, one_filesystem=True)
+        # folder0 is listed but its nested folder and files are not
+        self.assertTrue(estimate['Exact'])
+        self.assertEqual(estimate['Folders'], 59)
+        self.assertEqual(estimate['Files'], 87)
+
+    def test_seconds_measured(self):
+        estimate = estimate_tree(self.test_dir, include_files=True)
+        self.assertGreater(estimate['Seconds'], 0)
+        journaled = estimate_tree(self.test_dir, include_files=True, journaled=True)
+        self.assertGreater(journaled['Seconds'], 0)
+
+    def test_copy_seconds(self):
+        estimate = estimate_tree(self.test_dir, include_files=True)
+        dest_dir = tempfile.mkdtemp()
+        try:
+            self.assertGreater(estimate_copy_seconds(estimate, dest_dir), 0)
+            # Nothing is left behind on the destination
+            self.assertEqual(os.listdir(dest_dir), [])
+            throttle = IOThrottle(bytes_per_second=100)
+            self.assertEqual(estimate_copy_seconds(estimate, dest_dir, throttle), 9.0)
+        finally:
+            shutil.rmtree(dest_dir)
+
+    def test_check_free_space(self):
+        enough, free = check_free_space(self.test_dir, 0)
+        self.assertTrue(enough)
+        enough, _ = check_free_space(self.test_dir, free + 1)
+        self.assertFalse(enough)
+
+
+class TestReports(unittest.TestCase):
+
+    def setUp(self):
+        self.data = [
+            {'Type': 'Folder', 'Name': 'a', 'Path': '/root/a', 'Extension': ''},
+            {'Type': 'File', 'Name': 'Report.txt', 'Path': '/root/report.txt', 'Extension': '.txt', 'Size': 10},
+            {'Type': 'File', 'Name': 'report.txt', 'Path': '/root/a/report.txt', 'Extension': '.TXT', 'Size': 30},
+            {'Type': 'File', 'Name': 'image.png', 'Path': '/root/a/image.png', 'Extension': '.png', 'Size': 100},
+            {'Type': 'File', 'Name': 'notes', 'Path': '/root/a/notes', 'Extension': '', 'Size': 5},
+            {'Type': 'File', 'Name': 'report.txt', 'Path': '/root/a/b/report.txt', 'Extension': '.txt', 'Size': 30},
+        ]
+
+    def test_find_duplicate_frame_matches_format_duplicate_results(self):
+        frame = find_duplicate_frame(self.data)
+        self.assertEqual(list(frame['Path']), ['/root/report.txt', '/root/a/report.txt', '/root/a/b/report.txt'])
+        self.assertEqual(list(frame['File_Number']), [1, 2, 3])
+        self.assertEqual(list(frame['Total_in_Group']), [3, 3, 3])
+        self.assertEqual(set(frame['Duplicate_Group']), {1})
+
+        duplicates = {'report.txt': [dict(row) for row in self.data if row['Name'].lower() == 'report.txt']}
+        formatted = format_duplicate_results(duplicates)
+        self.assertEqual(list(formatted['Path']), list(frame['Path']))
+        self.assertEqual(list(formatted['Size_Bytes']), list(frame['Size_Bytes']))
+
+    def test_summarize_by_extension(self):
+        summary = summarize_by_extension(self.data).set_index('Extension')
+        self.assertEqual(summary.loc['.txt', 'Files'], 3)
+        self.assertEqual(summary.loc['.txt', 'Total_Size_Bytes'], 70)
+        self.assertEqual(summary.loc['(none)', 'Files'], 1)
+        self.assertEqual(summary.index[0], '.png')  # Largest total first
+
+    def test_summarize_by_depth(self):
+        summary = summarize_by_depth(self.data, '/root').set_index('Depth')
+        self.assertEqual(summary.loc[1, 'Folders'], 1)
+        self.assertEqual(summary.loc[1, 'Files'], 1)
+        self.assertEqual(summary.loc[2, 'Files'], 3)
+        self.assertEqual(summary.loc[3, 'Cumulative_Size_Bytes'], 175)
+
+    def test_largest_files(self):
+        largest = largest_files(self.data, count=2)
+        self.assertEqual(list(largest['Name']), ['image.png', 'report.txt'])
+
+    def test_save_summary_sheets(self):
+        with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            save_to_excel(self.data, tmp_path, build_summary_sheets(self.data, '/root'))
+            sheets = pd.read_excel(tmp_path, sheet_name=None, engine="openpyxl")
+            self.assertEqual(len(next(iter(sheets.values()))), len(self.data))
+            self.assertIn('By Extension', sheets)
+            self.assertIn('By Depth', sheets)
+            self.assertIn('Largest Files', sheets)
+        finally:
+            os.remove(tmp_path)
+
+
+class TestVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source_dir, "subfolder", "nested"))
+        with open(os.path.join(self.source_dir, "file1.txt"), "w") as f:
+            f.write("Hello")
+        with open(os.path.join(self.source_dir, "subfolder", "file2.txt"), "w") as f:
+            f.write("World")
+        with open(os.path.join(self.source_dir, "subfolder", "nested", "file3.txt"), "w") as f:
+            f.write("Nested")
+        replicate_folder_structure(self.source_dir, self.dest_dir, include_files=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.source_dir)
+        shutil.rmtree(self.dest_dir)
+
+    def test_identical_replica(self):
+        for level in ('exists', 'size', 'content'):
+            differences, stats = verify_replica(self.source_dir, self.dest_dir, level=level)
+            self.assertEqual(differences, [])
+            self.assertEqual(stats['Compared'], 5)
+
+    def test_missing_extra_and_mismatched(self):
+        os.remove(os.path.join(self.dest_dir, "subfolder", "nested", "file3.txt"))
+        with open(os.path.join(self.dest_dir, "extra.txt"), "w") as f:
+            f.write("Extra")
+        with open(os.path.join(self.dest_dir, "subfolder", "file2.txt"), "w") as f:
+            f.write("Wrong")  # Same size, different content
+        shutil.copystat(os.path.join(self.source_dir, "subfolder", "file2.txt"),
+                        os.path.join(self.dest_dir, "subfolder", "file2.txt"))
+
+        differences, stats = verify_replica(self.source_dir, self.dest_dir, level='size')
+        found = {(d['Difference'], d['Relative Path']) for d in differences}
+        self.assertEqual(found, {('Missing', 'subfolder/nested/file3.txt'), ('Extra', 'extra.txt')})
+
+        differences, stats = verify_replica(self.source_dir, self.dest_dir, level='content')
+        found = {(d['Difference'], d['Relative Path']) for d in differences}
+        self.assertIn(('Mismatched', 'subfolder/file2.txt'), found)
+        self.assertEqual(stats['Mismatched'], 1)
+
+    def test_followed_symlinks_verified_once(self):
+        source_dir = tempfile.mkdtemp()
+        target_dir = tempfile.mkdtemp()
+        dest_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(source_dir, "data"))
+            with open(os.path.join(source_dir, "data", "d.txt"), "w") as f:
+                f.write("data")
+            with open(os.path.join(target_dir, "o.txt"), "w") as f:
+                f.write("outside")
+            # A loop back to its parent and two links to the same outside folder
+            os.symlink(os.path.join(source_dir, "data"), os.path.join(source_dir, "data", "loop"))
+            os.symlink(target_dir, os.path.join(source_dir, "ext1"))
+            os.symlink(target_dir, os.path.join(source_dir, "ext2"))
+
+            replicate_folder_structure(source_dir, dest_dir, include_files=True, follow_symlinks=True)
+            differences, stats = verify_replica(source_dir, dest_dir, level='size', follow_symlinks=True)
+            self.assertEqual(differences, [])
+            self.assertEqual(stats['Compared'], 6)
+        finally:
+            for folder in (source_dir, target_dir, dest_dir):
+                shutil.rmtree(folder)
+
+    def test_one_filesystem_skips_mount_points(self):
+        mounted = os.path.join(self.source_dir, "subfolder")
+
+        def fake_stat(path, throttle=None):
+            st = os.stat(path)
+            if os.path.normpath(path) == mounted:
+                return mock.Mock(st_dev=st.st_dev + 1, st_ino=st.st_ino, st_size=st.st_size,
+                                 st_mtime=st.st_mtime, st_nlink=st.st_nlink)
+            return st
+
+        dest_dir = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(traversal_module, 'stat_file', side_effect=fake_stat), \
+                    mock.patch.object(verifier_module, 'stat_file', side_effect=fake_stat):
+                replicate_folder_structure(self.source_dir, dest_dir, include_files=True, one_filesystem=True)
+                # The mount point folder is replicated but not its contents
+                self.assertEqual(os.listdir(os.path.join(dest_dir, "subfolder")), [])
+                differences, stats = verify_replica(self.source_dir, dest_dir, one_filesystem=True)
+                self.assertEqual(differences, [])
+                self.assertEqual(stats['Compared'], 2)
+
+                differences, _ = verify_replica(self.source_dir, dest_dir)
+                self.assertEqual({d['Relative Path'] for d in differences}, {'subfolder/file2.txt', 'subfolder/nested'})
+        finally:
+            shutil.rmtree(dest_dir)
+
+    def test_file_stats_are_throttled(self):
+        throttle = IOThrottle()
+        with mock.patch.object(throttle.stats, 'consume', wraps=throttle.stats.consume) as consume:
+            differences, stats = verify_replica(self.source_dir, self.dest_dir, level='size', throttle=throttle)
+        self.assertEqual(differences, [])
+        # Source and replica stat of each of the three files
+        self.assertEqual(consume.call_count, 6)
+
+    def test_stops_after_threshold(self):
+        shutil.rmtree(os.path.join(self.dest_dir, "subfolder"))
+        os.remove(os.path.join(self.dest_dir, "file1.txt"))
+        differences, stats = verify_replica(self.source_dir, self.dest_dir, max_differences=0)
+        self.assertEqual(len(differences), 1)
+        self.assertTrue(stats['Stopped Early'])
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            verify_replica(self.source_dir, self.dest_dir, level='fast')
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        for shard in ("shard_a", "shard_b"):
+            os.makedirs(os.path.join(self.test_dir, shard, "nested"))
+            with open(os.path.join(self.test_dir, shard, "nested", "document.txt"), "w") as f:
+                f.write(f"Content of {shard}")
+            with open(os.path.join(self.test_dir, shard, f"{shard}.pdf"), "w") as f:
+                f.write("PDF content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.output_dir)
+
+    def test_round_trip(self):
+        data = collect_folders_and_files(self.test_dir, include_files=True)
+        manifest_path = os.path.join(self.output_dir, "full.fsm")
+        self.assertEqual(write_manifest(data, manifest_path, self.test_dir), len(data))
+
+        rows = list(iter_manifest(manifest_path))
+        self.assertEqual([row['Path'] for row in rows], sorted(row['Path'] for row in data))
+        by_path = {row['Path']: row for row in data}
+        for row in rows:
+            self.assertEqual(row, by_path[row['Path']])
+        self.assertEqual(read_manifest_header(manifest_path)['root'], Path(self.test_dir).as_posix())
+
+    def test_rejects_other_files(self):
+        bad_path = os.path.join(self.output_dir, "bad.fsm")
+        with open(bad_path, "wb") as f:
+            f.write(b"not a manifest")
+        with self.assertRaises((ValueError, OSError)):
+            list(iter_manifest(bad_path))
+
+    def test_shards_from_separate_processes_merge(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        shard_paths = []
+        processes = []
+        for shard in ("shard_a", "shard_b"):
+            shard_path = os.path.join(self.output_dir, f"{shard}.fsm")
+            shard_paths.append(shard_path)
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "src.manifest", "scan", os.path.join(self.test_dir, shard), shard_path, "--include-files"],
+                cwd=project_root, stdout=subprocess.DEVNULL
+            ))
+        for process in processes:
+            self.assertEqual(process.wait(), 0)
+
+        merged = list(merge_manifests(shard_paths))
+        self.assertEqual([row['Path'] for row in merged], sorted(row['Path'] for row in merged))
+        # The shard roots are included, so the merge matches one scan of the whole tree
+        full_scan = collect_folders_and_files(self.test_dir, include_files=True)
+        by_path = {row['Path']: row for row in full_scan}
+        self.assertEqual(len(merged), 8)
+        self.assertEqual([row['Path'] for row in merged], sorted(by_path))
+        for row in merged:
+            self.assertEqual(row, by_path[row['Path']])
+        # Overlapping shards do not produce repeated entries
+        self.assertEqual(len(list(merge_manifests(shard_paths + shard_paths[:1]))), 8)
+
+        report_path = os.path.join(self.output_dir, "merged.xlsx")
+        stats = merge_to_report(shard_paths, report_path)
+        self.assertEqual(stats, {'Entries': 8, 'Duplicates': 2})
+        sheets = pd.read_excel(report_path, sheet_name=None, engine="openpyxl")
+        self.assertEqual(len(sheets['Sheet1']), 8)
+        self.assertEqual(set(sheets['Duplicates']['Name']), {'document.txt'})
+        self.assertEqual(sheets['By Extension'].set_index('Extension').loc['.pdf', 'Files'], 2)
+
+    def test_single_shard_matches_scan(self):
+        shard_path = os.path.join(self.output_dir, "shard_a.fsm")
+        scan_to_manifest(os.path.join(self.test_dir, "shard_a"), shard_path, include_files=True)
+        merged = [row['Path'] for row in merge_manifests([shard_path])]
+        scanned = collect_folders_and_files(os.path.join(self.test_dir, "shard_a"), include_files=True)
+        self.assertEqual(merged, sorted(row['Path'] for row in scanned))
+
+    def test_rejects_shards_with_different_options(self):
+        shard_paths = [os.path.join(self.output_dir, f"{shard}.fsm") for shard in ("shard_a", "shard_b")]
+        scan_to_manifest(os.path.join(self.test_dir, "shard_a"), shard_paths[0], include_files=True)
+        scan_to_manifest(os.path.join(self.test_dir, "shard_b"), shard_paths[1], include_files=True, extensions=[".pdf"])
+        with self.assertRaises(ValueError):
+            merge_to_manifest(shard_paths, os.path.join(self.output_dir, "merged.fsm"))
+        with self.assertRaises(ValueError):
+            merge_to_report(shard_paths, os.path.join(self.output_dir, "merged.xlsx"))
+
+    def test_hardlinks_split_across_shards_counted_once(self):
+        with open(os.path.join(self.test_dir, "shard_a", "big.bin"), "wb") as f:
+            f.write(b"x" * 1000)
+        os.link(os.path.join(self.test_dir, "shard_a", "big.bin"), os.path.join(self.test_dir, "shard_b", "big_link.bin"))
+        shard_paths = [os.path.join(self.output_dir, f"{shard}.fsm") for shard in ("shard_a", "shard_b")]
+        for shard, shard_path in zip(("shard_a", "shard_b"), shard_paths):
+            scan_to_manifest(os.path.join(self.test_dir, shard), shard_path, include_files=True)
+
+        merged = list(merge_manifests(shard_paths))
+        full_scan = collect_folders_and_files(self.test_dir, include_files=True)
+        self.assertEqual(get_size_totals(merged), get_size_totals(full_scan))
+
+        report_path = os.path.join(self.output_dir, "merged.xlsx")
+        merge_to_report(shard_paths, report_path)
+        by_extension = pd.read_excel(report_path, sheet_name='By Extension', engine="openpyxl").set_index('Extension')
+        self.assertEqual(by_extension.loc['.bin', 'Total_Size_Bytes'], 2000)
+        self.assertEqual(by_extension.loc['.bin', 'Unique_Size_Bytes'], 1000)
+
+    def test_report_reads_shards_twice(self):
+        shard_paths = [os.path.join(self.output_dir, f"{shard}.fsm") for shard in ("shard_a", "shard_b")]
+        for shard, shard_path in zip(("shard_a", "shard_b"), shard_paths):
+            scan_to_manifest(os.path.join(self.test_dir, shard), shard_path, include_files=True)
+        with mock.patch.object(manifest_module, '_iter_records', wraps=manifest_module._iter_records) as records:
+            stats = merge_to_report(shard_paths, os.path.join(self.output_dir, "merged.xlsx"))
+        self.assertEqual(stats['Duplicates'], 2)
+        # One pass for the rows and summaries, one for the duplicate rows
+        self.assertEqual(records.call_count, 2 * len(shard_paths))
+
+    def test_duplicates_sheet_split_at_row_limit(self):
+        shard_paths = [os.path.join(self.output_dir, f"{shard}.fsm") for shard in ("shard_a", "shard_b")]
+        for shard, shard_path in zip(("shard_a", "shard_b"), shard_paths):
+            scan_to_manifest(os.path.join(self.test_dir, shard), shard_path, include_files=True)
+        report_path = os.path.join(self.output_dir, "merged.xlsx")
+        with mock.patch.object(manifest_module, 'MAX_SHEET_ROWS', 1):
+            merge_to_report(shard_paths, report_path)
+        sheets = pd.read_excel(report_path, sheet_name=None, engine="openpyxl")
+        self.assertEqual(len(sheets['Duplicates']), 1)
+        self.assertEqual(len(sheets['Duplicates (2)']), 1)
+        self.assertEqual(len(sheets['Sheet1 (8)']), 1)
+
+
+
 if __name__ == "__main__":
     unittest.main()